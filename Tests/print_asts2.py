@@ -264,7 +264,7 @@ def setup_lexer():
          spec_updated = True
     
     if spec_updated and hasattr(Lexer, 'DEFAULT_TOKEN_SPEC'):
-         try: Lexer.master_pattern = re.compile("|".join(f"(?P<{name}>{pat})" for name, pat in Lexer.DEFAULT_TOKEN_SPEC))
+         try: Lexer.rebuild_tokenizers()
          except AttributeError: pass
          except re.error: print("Warning: Regex error during test setup.", file=sys.stderr)
 
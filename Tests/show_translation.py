@@ -46,7 +46,7 @@ def translate_and_show(name: str, source: str):
     try:
         # 1. Lex
         lexer = Lexer()
-        tokens = list(lexer.tokenize(source_to_compile, filename=filename))
+        tokens = lexer.tokenize_list(source_to_compile, filename=filename)
 
         # 2. Parse
         parser = Parser(tokens)
@@ -57,7 +57,7 @@ def translate_and_show(name: str, source: str):
         symbol_table = analyzer.analyze(ast) # Get populated symbol table and type info
 
         # 4. Code Generation
-        code_gen = CodeGenerator(symbol_table, analyzer.node_types)
+        code_gen = CodeGenerator(symbol_table)
         # Target only the main algorithm block for IR generation
         main_algo_node = ast.main.algorithm
         code_gen.ir_code = [] # Reset just in case
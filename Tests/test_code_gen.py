@@ -5,10 +5,10 @@ import os
 import re
 from typing import List
 
-# Add project root to import path
+# Put the project root first on the import path, ahead of the older module
+# copies kept in Tests/ (pytest puts this directory first)
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if parent_dir not in sys.path:
-    sys.path.insert(0, parent_dir)
+sys.path.insert(0, parent_dir)
 
 # --- Import necessary classes and exceptions ---
 from lexer import Lexer, LexerError
@@ -49,7 +49,7 @@ class TestCodeGen(unittest.TestCase):
             symbol_table = analyzer.analyze(ast)
 
             # 4. Code Generation
-            code_gen = CodeGenerator(symbol_table, analyzer.node_types)
+            code_gen = CodeGenerator(symbol_table)
             main_algo_node = ast.main.algorithm
 
             # Reset and generate code ONLY for the main algorithm node
@@ -89,7 +89,7 @@ class TestCodeGen(unittest.TestCase):
             symbol_table = analyzer.analyze(ast)
 
             # 4. Code Generation
-            code_gen = CodeGenerator(symbol_table, analyzer.node_types)
+            code_gen = CodeGenerator(symbol_table)
             main_algo_node = ast.main.algorithm # Target the main algorithm
 
             # Reset and generate code ONLY for the main algorithm node
@@ -164,6 +164,30 @@ class TestCodeGen(unittest.TestCase):
         self.assertTrue(re.match(r"t\d+ = t\d+ \* v_c_\d+", actual_ir[2]))
         self.assertTrue(re.match(r"v_a_\d+ = t\d+", actual_ir[3]))
 
+    def test_constant_folding(self):
+        full_source = "glob { a } proc {} func {} main { var {} a = ((2 plus 3) mult 4) }"
+        actual_ir = self._run_full_analysis_codegen(full_source)
+        self.assertEqual(len(actual_ir), 2)
+        self.assertEqual(actual_ir[0], "t1 = 20")
+        self.assertTrue(re.match(r"v_a_\d+ = t1", actual_ir[1]))
+
+    def test_negative_fold_uses_negation(self):
+        full_source = "glob { a } proc {} func {} main { var {} a = (1 minus 3) }"
+        actual_ir = self._run_full_analysis_codegen(full_source)
+        self.assertEqual(actual_ir[:2], ["t1 = 2", "t2 = - t1"])
+        self.assertTrue(re.match(r"v_a_\d+ = t2", actual_ir[2]))
+
+    def test_comparison_not_folded(self):
+        full_source = "glob { a } proc {} func {} main { var {} do { halt } until (1 > 2) }"
+        actual_ir = self._run_full_analysis_codegen(full_source)
+        self.assertTrue(any(re.match(r"t\d+ = t\d+ > t\d+", line) for line in actual_ir))
+
+    def test_inexact_division_not_folded(self):
+        full_source = "glob { a } proc {} func {} main { var {} a = (7 div 2) }"
+        actual_ir = self._run_full_analysis_codegen(full_source)
+        self.assertEqual(len(actual_ir), 4)
+        self.assertTrue(re.match(r"t\d+ = t\d+ / t\d+", actual_ir[2]))
+
     def test_negation(self):
         full_source = "glob { x y } proc {} func {} main { var {} x = (neg y) }"
         actual_ir = self._run_full_analysis_codegen(full_source)
@@ -314,5 +338,48 @@ class TestCodeGen(unittest.TestCase):
         with self.assertRaisesRegex(SemanticError, "Assignment to 'x' requires numeric value, got boolean"):
             self._run_full_analysis_codegen(full_source)
 
+    def test_duplicate_declaration_errors_in_source_order(self):
+        cases = [
+            ("glob { a b b a } proc {} func {} main { var {} halt }",
+             "Duplicate variable declaration 'b' in the same scope"),
+            ("glob { z } proc { pdef z() { local {} halt } pdef z() { local {} halt } } func {} main { var {} halt }",
+             "Duplicate declaration of 'z' in the same scope"),
+            ("glob {} proc { pdef q(g) { local { p g p } halt } } func {} main { var {} halt }",
+             "Duplicate declaration of 'g' in the same scope"),
+        ]
+        for source, message in cases:
+            with self.subTest(source=source):
+                with self.assertRaisesRegex(SemanticError, f"^{re.escape(message)}$"):
+                    self._run_full_analysis_codegen(source)
+
+    def test_reanalysis_rebinds_names(self):
+        full_source = "glob { y } proc {} func {} main { var { y } y = 1; y = (y plus 2); print y }"
+        ast = Parser(list(Lexer().tokenize(full_source))).parse()
+        analyzer = SemanticAnalyzer()
+        for _ in range(2):
+            # The second run declares fresh unique names; reads must follow the writes
+            code_gen = CodeGenerator(analyzer.analyze(ast))
+            code_gen._visit(ast.main.algorithm)
+            self.assertEqual(len(set(re.findall(r"v_y_\d+", " ".join(code_gen.ir_code)))), 1)
+
+    def test_program_analyzed_only_at_top_level(self):
+        ast = Parser(list(Lexer().tokenize("glob { x } proc {} func {} main { var {} x = 1 }"))).parse()
+        analyzer = SemanticAnalyzer()
+        analyzer.symbol_table.enter_scope("Global", None)
+        with self.assertRaisesRegex(SemanticError, "scope level 0, not 1"):
+            analyzer.analyze(ast)
+
+    def test_reanalysis_after_invalidate_rechecks_enclosing_operators(self):
+        full_source = "glob { x } proc {} func {} main { var {} x = (x plus (1 plus 2)) }"
+        ast = Parser(list(Lexer().tokenize(full_source))).parse()
+        analyzer = SemanticAnalyzer()
+        analyzer.analyze(ast)
+        # Edit the inner operation to a comparison: the outer 'plus' now gets a boolean operand
+        inner = ast.main.algorithm.instructions[0].rhs.term.right_operand.value.term
+        inner.operator = "eq"
+        analyzer.invalidate(inner)
+        with self.assertRaisesRegex(SemanticError, "requires numeric right operand, got boolean"):
+            analyzer.analyze(ast)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
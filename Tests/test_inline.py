@@ -5,10 +5,10 @@ import os
 import re
 from typing import List
 
-# Add project root to import path
+# Put the project root first on the import path, ahead of the older module
+# copies kept in Tests/ (pytest puts this directory first)
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if parent_dir not in sys.path:
-    sys.path.insert(0, parent_dir)
+sys.path.insert(0, parent_dir)
 
 # --- Import necessary classes ---
 from inline import Inliner, FunctionBodyInfo # Assuming inline.py is in the project root
@@ -1,4 +1,12 @@
 import unittest
+import sys
+import os
+
+# Put the project root first on the import path, ahead of the older module
+# copies kept in Tests/ (pytest puts this directory first)
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
 from lexer import Lexer, Token, LexerError
 
 class TestLexerBasics(unittest.TestCase):
@@ -13,6 +21,17 @@ class TestLexerBasics(unittest.TestCase):
         self.assertEqual(tokens[1].type, 'ID')
         self.assertEqual(tokens[1].value, 'counter')
 
+    def test_keyword_prefix_is_identifier(self):
+        src = "printer print do1 do"
+        tokens = list(self.lex.tokenize(src))
+        self.assertEqual([t.type for t in tokens], ['ID', 'PRINT', 'ID', 'DO', 'EOF'])
+        self.assertEqual(tokens[0].value, 'printer')
+        self.assertEqual(tokens[2].value, 'do1')
+
+    def test_tokenize_list_matches_tokenize(self):
+        src = "glob { x }\nmain { var { y } y = (x plus 1); print \"hi\" } // done\n"
+        self.assertEqual(self.lex.tokenize_list(src), list(self.lex.tokenize(src)))
+
     def test_numbers(self):
         src = "x = 42\npi = 3.1415\nbig = 6.02e23\n"
         tokens = list(self.lex.tokenize(src))
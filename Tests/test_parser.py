@@ -1,6 +1,14 @@
 # test_parser.py
 import unittest
 import re
+import sys
+import os
+
+# Put the project root first on the import path, ahead of the older module
+# copies kept in Tests/ (pytest puts this directory first)
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
 from lexer import Lexer, LexerError
 from parser_spl import Parser, ParseError
 from ast_nodes import *
@@ -36,7 +44,7 @@ class TestParserSPL(unittest.TestCase):
              spec_updated = True
 
         if spec_updated and hasattr(Lexer, 'DEFAULT_TOKEN_SPEC'):
-             try: Lexer.master_pattern = re.compile("|".join(f"(?P<{name}>{pat})" for name, pat in Lexer.DEFAULT_TOKEN_SPEC))
+             try: Lexer.rebuild_tokenizers()
              except AttributeError: pass
              except re.error: print("Warning: Regex error during test setup.")
 
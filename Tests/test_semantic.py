@@ -47,6 +47,7 @@ def test_case(name: str, source: str, should_fail: bool = False):
         
         # Semantic analysis
         analyzer = SemanticAnalyzer()
+        analyzer.enable_scope_history()
         symbol_table = analyzer.analyze(ast)
         
         if should_fail:
@@ -3,7 +3,7 @@ import sys
 import os
 
 # Add project root to import path so we can import symbol_table.py
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from symbol_table import SymbolTable, SymbolInfo, SymbolTableError
 
@@ -13,7 +13,8 @@ class TestSymbolTable(unittest.TestCase):
         self.symtab.enter_scope("Global")
 
     def tearDown(self):
-        self.symtab._scopes.clear()
+        while self.symtab.current_scope_level():
+            self.symtab.exit_scope()
 
     def test_declare_and_lookup_variable(self):
         self.symtab.declare_var("x", decl_type="numeric")
@@ -39,6 +40,9 @@ class TestSymbolTable(unittest.TestCase):
         self.symtab.declare_var("a", decl_type="numeric")
         with self.assertRaises(SymbolTableError):
             self.symtab.declare_var("a", decl_type="boolean")
+        # the rejected declaration does not use up a unique name
+        self.symtab.enter_scope("Proc")
+        self.assertEqual(self.symtab.declare_var("a").unique_name, "v_a_2")
 
     def test_unique_name_generation(self):
         n1 = self.symtab._gen_unique_name("x")
@@ -53,6 +57,78 @@ class TestSymbolTable(unittest.TestCase):
         self.assertGreater(self.symtab.current_scope_level(), global_scope_level)
         self.symtab.exit_scope()
 
+    def test_exit_scope_restores_outer_binding(self):
+        outer = self.symtab.declare_var("x", decl_type="numeric")
+        self.symtab.enter_scope("Proc")
+        inner = self.symtab.declare_param("x")
+        self.assertIs(self.symtab.lookup("x"), inner)
+        self.symtab.exit_scope()
+        self.assertIs(self.symtab.lookup("x"), outer)
+
+    def test_find_symbol_by_node(self):
+        node = object()
+        info = self.symtab.declare_var("x", node=node)
+        self.assertIs(self.symtab.find_symbol_by_node(node), info)
+        self.symtab.enter_scope("Proc")
+        inner_node = object()
+        self.assertIsNone(self.symtab.try_declare([("y", inner_node)], "param", "numeric"))
+        inner = self.symtab.lookup("y")
+        self.assertIs(self.symtab.find_symbol_by_node(inner_node), inner)
+        self.symtab.exit_scope()
+        self.assertIsNone(self.symtab.find_symbol_by_node(inner_node))
+        self.assertIs(self.symtab.find_symbol_by_node(node), info)
+
+    def test_find_symbol_by_none_node(self):
+        self.symtab.declare_var("x")
+        self.assertIsNone(self.symtab.find_symbol_by_node(None))
+
+    def test_explicit_zero_node_id_is_kept(self):
+        class Node:
+            node_id = 0
+        info = self.symtab.declare_var("x", node=Node())
+        self.assertEqual(info.node_id, 0)
+        self.assertIsNone(self.symtab.try_declare([("y", Node())], "var", "numeric"))
+        self.assertEqual(self.symtab.lookup("y").node_id, 0)
+
+    def test_bulk_declare_matches_single_declares(self):
+        self.assertIsNone(self.symtab.try_declare([("a", None), ("b", None)], "var", "numeric"))
+        self.assertEqual([self.symtab.lookup(n).unique_name for n in "ab"], ["v_a_1", "v_b_1"])
+        self.assertEqual(self.symtab.try_declare([("c", None), ("a", None)], "param", "numeric"),
+                         "Duplicate declaration of 'a' in the same scope")
+
+    def test_symbol_infos_compare_by_identity(self):
+        outer = self.symtab.declare_var("x")
+        self.symtab.enter_scope("Proc")
+        inner = self.symtab.declare_var("x")
+        self.assertEqual(len({outer, inner, self.symtab.lookup("x")}), 2)
+
+    def test_extra_created_on_first_write(self):
+        info = self.symtab.declare_func("f")
+        self.assertEqual(dict(info.get_extra()), {})
+        info.set_extra("param_names", ["a"])
+        self.assertEqual(info.get_extra()["param_names"], ["a"])
+        self.assertEqual(dict(self.symtab.declare_func("g").get_extra()), {})
+
+    def test_try_declare_reports_instead_of_raising(self):
+        self.assertIsNone(self.symtab.try_declare([("f", None)], "func"))
+        self.assertEqual(self.symtab.lookup("f").kind, "func")
+        error = self.symtab.try_declare([("f", None)], "var", "numeric")
+        self.assertIn("Duplicate declaration of 'f'", error)
+
+    def test_snapshot_unaffected_by_later_declarations(self):
+        self.symtab.declare_var("x", decl_type="numeric")
+        snap = self.symtab.get_scope_snapshot()
+        self.symtab.declare_var("y", decl_type="numeric")
+        self.assertEqual(sorted(snap[0]), ["x"])
+        self.assertIsNotNone(self.symtab.lookup("y"))
+
+    def test_snapshot_copy_is_independent(self):
+        self.symtab.declare_var("x", decl_type="numeric")
+        snap = self.symtab.get_scope_snapshot_copy()
+        snap[0].pop("x")
+        self.assertIsNotNone(self.symtab.lookup("x"))
+        self.assertIn("x", self.symtab.get_scope_snapshot()[0])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -3,12 +3,17 @@
 
 # Import 'fields' (plural) to iterate over dataclass fields
 from dataclasses import dataclass, field, fields
-from typing import List, Optional, Union
+from typing import Any, List, Optional, Union
 
 # --- Base Node ---
-@dataclass
+@dataclass(slots=True)
 class ASTNode:
     """Base class for all AST nodes."""
+
+    # Nodes are slotted (no per-instance __dict__), so everything later passes
+    # attach must be declared here. Annotations are init/repr/compare=False:
+    # they stay out of __init__, repr, __eq__ and pretty_print.
+    _sem_type: Optional[int] = field(default=None, init=False, repr=False, compare=False)  # NUMERIC | BOOLEAN tag once type-checked
     
     def pretty_print(self, indent_level: int = 0) -> str:
         """Recursively builds an indented string representation of the node."""
@@ -19,6 +24,7 @@ class ASTNode:
         
         # *** FIX: Use fields() (plural) to iterate ***
         for f in fields(self):
+            if not f.repr: continue  # analysis annotations
             val = getattr(self, f.name)
             child_indent = "  " * (indent_level + 1)
             
@@ -46,60 +52,61 @@ class ASTNode:
 # --- Specific Node Classes ---
 # Overriding pretty_print for simple/leaf nodes
 
-@dataclass
+@dataclass(slots=True)
 class ProgramNode(ASTNode):
     globals: 'VariableDeclsNode'
     procs: 'ProcDefsNode'
     funcs: 'FuncDefsNode'
     main: 'MainProgNode'
 
-@dataclass
+@dataclass(slots=True)
 class VarNode(ASTNode):
     name: str
+    symbol_info: Optional[Any] = field(default=None, init=False, repr=False, compare=False)  # SymbolInfo once the name is resolved
     def pretty_print(self, indent_level: int = 0) -> str:
         unique_name = f", unique={self.symbol_info.unique_name}" if self.symbol_info else ""
         return f"{'  ' * indent_level}VarNode(name={self.name!r}{unique_name})"
 
-@dataclass
+@dataclass(slots=True)
 class VariableDeclsNode(ASTNode):
     variables: List[VarNode] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class ProcedureDefNode(ASTNode):
     name: VarNode
     params: 'Max3Node'
     body: 'BodyNode'
 
-@dataclass
+@dataclass(slots=True)
 class ProcDefsNode(ASTNode):
     procedures: List[ProcedureDefNode] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class FunctionDefNode(ASTNode):
     name: VarNode
     params: 'Max3Node'
     body: 'BodyNode'
     return_atom: 'AtomNode'
 
-@dataclass
+@dataclass(slots=True)
 class FuncDefsNode(ASTNode):
     functions: List[FunctionDefNode] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class BodyNode(ASTNode):
     locals: 'Max3Node'
     algorithm: 'AlgorithmNode'
 
-@dataclass
+@dataclass(slots=True)
 class Max3Node(ASTNode):
     variables: List[VarNode] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class MainProgNode(ASTNode):
     locals: 'VariableDeclsNode'
     algorithm: 'AlgorithmNode'
 
-@dataclass
+@dataclass(slots=True)
 class AtomNode(ASTNode):
     value: Union[VarNode, int]
     def pretty_print(self, indent_level: int = 0) -> str:
@@ -110,18 +117,18 @@ class AtomNode(ASTNode):
         else:
             return f"{indent}AtomNode(value={self.value!r})"
 
-@dataclass
+@dataclass(slots=True)
 class AlgorithmNode(ASTNode):
     instructions: List[ASTNode] = field(default_factory=list)
 
 # --- Instruction Nodes ---
 
-@dataclass
+@dataclass(slots=True)
 class HaltNode(ASTNode):
     def pretty_print(self, indent_level: int = 0) -> str:
         return f"{'  ' * indent_level}HaltNode"
 
-@dataclass
+@dataclass(slots=True)
 class PrintNode(ASTNode):
     output: Union[AtomNode, str]
     def pretty_print(self, indent_level: int = 0) -> str:
@@ -133,32 +140,32 @@ class PrintNode(ASTNode):
             # For string literals
             return f"{indent}PrintNode(output={self.output!r})"
 
-@dataclass
+@dataclass(slots=True)
 class ProcedureCallNode(ASTNode):
     name: VarNode
     arguments: 'InputNode'
 
-@dataclass
+@dataclass(slots=True)
 class AssignmentNode(ASTNode):
     variable: VarNode
     rhs: ASTNode 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionCallNode(ASTNode):
     name: VarNode
     arguments: 'InputNode'
 
-@dataclass
+@dataclass(slots=True)
 class WhileLoopNode(ASTNode):
     condition: 'TermNode'
     body: 'AlgorithmNode'
 
-@dataclass
+@dataclass(slots=True)
 class DoUntilLoopNode(ASTNode):
     body: 'AlgorithmNode'
     condition: 'TermNode'
 
-@dataclass
+@dataclass(slots=True)
 class IfBranchNode(ASTNode):
     condition: 'TermNode'
     then_branch: 'AlgorithmNode'
@@ -166,7 +173,7 @@ class IfBranchNode(ASTNode):
 
 # --- Expression/Term Nodes ---
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOperationNode(ASTNode):
     operator: str
     operand: 'TermNode'
@@ -175,7 +182,7 @@ class UnaryOperationNode(ASTNode):
         return (f"{indent}UnaryOperationNode(operator={self.operator!r},\n"
                 f"{'  ' * (indent_level + 1)}operand:\n{self.operand.pretty_print(indent_level + 2)}\n{indent})")
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOperationNode(ASTNode):
     left_operand: 'TermNode'
     operator: str
@@ -186,14 +193,14 @@ class BinaryOperationNode(ASTNode):
                 f"{'  ' * (indent_level + 1)}left_operand:\n{self.left_operand.pretty_print(indent_level + 2)},\n"
                 f"{'  ' * (indent_level + 1)}right_operand:\n{self.right_operand.pretty_print(indent_level + 2)}\n{indent})")
 
-@dataclass
+@dataclass(slots=True)
 class ParenTermNode(ASTNode):
     term: Union[UnaryOperationNode, BinaryOperationNode]
     def pretty_print(self, indent_level: int = 0) -> str:
         # Print the wrapped term directly
         return self.term.pretty_print(indent_level)
 
-@dataclass
+@dataclass(slots=True)
 class TermNode(ASTNode):
     value: Union[AtomNode, ParenTermNode]
     def pretty_print(self, indent_level: int = 0) -> str:
@@ -201,10 +208,10 @@ class TermNode(ASTNode):
         return self.value.pretty_print(indent_level)
 
 # --- Input/Output Nodes ---
-@dataclass
+@dataclass(slots=True)
 class OutputNode(ASTNode): # Unused by parser, but defined
      value: Union[AtomNode, str]
 
-@dataclass
+@dataclass(slots=True)
 class InputNode(ASTNode):
     arguments: List[AtomNode] = field(default_factory=list)
\ No newline at end of file
@@ -5,18 +5,30 @@ from the validated and annotated SPL Abstract Syntax Tree (AST).
 Implements Task 7 based on Phase 4 specifications and Chapter 6 concepts.
 """
 
+import operator
 from typing import List, Optional, Union, Dict, Any
 from ast_nodes import *
 from symbol_table import SymbolTable, SymbolInfo, SymbolTableError
-from semantic_analyzer import SemanticAnalyzer # To get type info
+from semantic_analyzer import SemanticAnalyzer, BOOLEAN # To get type info
 
 class CodeGenError(Exception):
     pass
 
 class CodeGenerator:
-    def __init__(self, symbol_table: SymbolTable, node_types: Dict[int, str]):
+    # IR operator symbols, pre-padded with the surrounding spaces
+    _BINOP_SYMBOLS: Dict[str, str] = {
+        'plus': ' + ', 'minus': ' - ', 'mult': ' * ', 'div': ' / ', # [cite: 2736-2751]
+        'eq': ' = ', '>': ' > '                                    # [cite: 2721-2724, 2725-2728]
+    }
+
+    # Arithmetic operators that can be evaluated at compile time when both operands are literals
+    _FOLDABLE_OPS: Dict[str, Any] = {
+        'plus': operator.add, 'minus': operator.sub, 'mult': operator.mul,
+    }
+
+    def __init__(self, symbol_table: SymbolTable):
         self.symbol_table = symbol_table
-        self.node_types = node_types # Type info from semantic analyzer
+        # Type info from the semantic analyzer is read off the nodes (_sem_type)
         self.ir_code: List[str] = []
         self._temp_counter = 0
         self._label_counter = 0
@@ -36,6 +48,10 @@ class CodeGenerator:
         """Adds an instruction to the IR code list."""
         self.ir_code.append(instruction)
 
+    def _emit_lines(self, *instructions: str):
+        """Adds several fixed instructions (e.g. control-flow scaffolding) in one call."""
+        self.ir_code.extend(instructions)
+
     def _get_unique_var_name(self, var_name: str, node: ASTNode) -> str:
         """Looks up the unique IR name for a variable."""
         # We need the correct scope context for lookup, which isn't directly
@@ -127,10 +143,8 @@ class CodeGenerator:
     def _visit_UnaryOperationNode(self, node: UnaryOperationNode) -> str:
         operand_place = self._visit(node.operand)
         result_place = self._new_temp()
-        op_symbol = ""
         if node.operator == 'neg':
-            op_symbol = "-" # 
-            self._emit(f"{result_place} = {op_symbol} {operand_place}")
+            self._emit(''.join((result_place, ' = - ', operand_place)))
         elif node.operator == 'not':
             # 'not' is handled during conditional jumps, not as a direct calculation [cite: 2719-2720]
             # This node should primarily appear within a condition context
@@ -152,25 +166,32 @@ class CodeGenerator:
 
     def _visit_BinaryOperationNode(self, node: BinaryOperationNode) -> str:
         # Check node type for control flow vs arithmetic
-        node_type = self.node_types.get(id(node))
-        if node_type == 'boolean' and node.operator in ('and', 'or'):
+        node_type = node._sem_type
+        if node_type == BOOLEAN and node.operator in ('and', 'or'):
             # Logical operators are handled by short-circuiting in control flow
             raise CodeGenError(f"'{node.operator}' operator can only be used in conditions for code generation")
 
+        # Both operands are literals: evaluate now and load the result like a number atom
+        folded = self._fold_constant(node)
+        if folded is not None:
+            temp = self._new_temp()
+            self._emit(f"{temp} = {abs(folded)}")
+            if folded >= 0:
+                return temp
+            # IR literals are never negative: negate the magnitude like (neg ...) does
+            result_place = self._new_temp()
+            self._emit(''.join((result_place, ' = - ', temp)))
+            return result_place
+
         # Arithmetic or Comparison
         left_place = self._visit(node.left_operand)
         right_place = self._visit(node.right_operand)
         result_place = self._new_temp()
-        op_symbol = ""
-
-        op_map = {
-            'plus': '+', 'minus': '-', 'mult': '*', 'div': '/', # [cite: 2736-2751]
-            'eq': '=', '>': '>'                                # [cite: 2721-2724, 2725-2728]
-        }
 
-        if node.operator in op_map:
-            op_symbol = op_map[node.operator]
-            self._emit(f"{result_place} = {left_place} {op_symbol} {right_place}") # 
+        op_symbol = self._BINOP_SYMBOLS.get(node.operator)
+        if op_symbol is not None:
+            # Plain concatenation of the parts; no format-string parsing per node
+            self._emit(''.join((result_place, ' = ', left_place, op_symbol, right_place)))
         else:
             raise CodeGenError(f"Unknown or misplaced binary operator: {node.operator}")
 
@@ -179,6 +200,35 @@ class CodeGenerator:
         # We generate the comparison result into a temp; the IF will check it.
         return result_place
 
+    def _fold_constant(self, node: ASTNode) -> Optional[int]:
+        """
+        Returns the compile-time value of a literal arithmetic expression, or None
+        if it depends on a variable or call. Division only folds when exact, so
+        the target's division semantics are unchanged.
+        """
+        if isinstance(node, TermNode):
+            node = node.value
+        if isinstance(node, ParenTermNode):
+            node = node.term
+        if isinstance(node, AtomNode):
+            return node.value if isinstance(node.value, int) else None
+        if not isinstance(node, BinaryOperationNode):
+            return None
+
+        left = self._fold_constant(node.left_operand)
+        if left is None:
+            return None
+        right = self._fold_constant(node.right_operand)
+        if right is None:
+            return None
+
+        if node.operator == 'div':
+            if right == 0 or left % right != 0:
+                return None
+            return left // right
+        fold = self._FOLDABLE_OPS.get(node.operator)
+        return fold(left, right) if fold is not None else None
+
     # --- Control Flow ---
 
     def _visit_IfBranchNode(self, node: IfBranchNode):
@@ -194,15 +244,16 @@ class CodeGenerator:
             # (Condition code already generated)
             # Else block code comes first
             self._visit(node.else_branch)
-            self._emit(f"GOTO {label_exit}") # Jump over the 'then' block
-            self._emit(f"REM {label_then}") # Label for 'then' block
+            # Jump over the 'then' block, then the label for the 'then' block
+            self._emit_lines(f"GOTO {label_exit}", f"REM {label_then}")
             self._visit(node.then_branch)
             self._emit(f"REM {label_exit}") # Label after the statement
         else:
              # --- If-Then Translation (modified from textbook) --- 
             # (Condition code already generated, jumps to label_exit if false)
-            self._emit(f"GOTO {label_exit}") # Explicit jump if condition was false (simpler than textbook's implicit fallthrough)
-            self._emit(f"REM {label_then}") # Label for 'then' block
+            # Explicit jump if condition was false (simpler than textbook's implicit fallthrough),
+            # then the label for the 'then' block
+            self._emit_lines(f"GOTO {label_exit}", f"REM {label_then}")
             self._visit(node.then_branch)
             self._emit(f"REM {label_exit}") # Label after the statement
 
@@ -218,9 +269,8 @@ class CodeGenerator:
 
         self._emit(f"REM {label_body}") # Label for loop body [cite: 2702-2704]
         self._visit(node.body)
-        self._emit(f"GOTO {label_cond}") # Jump back to condition check
-
-        self._emit(f"REM {label_exit}") # Label after the loop [cite: 2702-2704]
+        # Jump back to condition check, then the label after the loop [cite: 2702-2704]
+        self._emit_lines(f"GOTO {label_cond}", f"REM {label_exit}")
 
     def _visit_DoUntilLoopNode(self, node: DoUntilLoopNode):
         label_body = self._new_label()
@@ -107,9 +107,12 @@ class Inliner:
         assignment_pattern = re.compile(r"^(v_\w+_\d+) = (t\d+)$")
 
         i = 0
-        while i < len(ir_code):
+        n = len(ir_code)
+        while i < n:
             instruction = ir_code[i]
-            call_match = call_pattern.match(instruction)
+            # Cheap substring test first: most lines are not calls, so they
+            # never reach the regex engine
+            call_match = call_pattern.match(instruction) if " = CALL " in instruction else None
 
             if call_match:
                 call_target_temp = call_match.group(1) # e.g., t2
@@ -138,7 +141,7 @@ class Inliner:
                 if has_return:
                     is_procedure_call = False
                     # Look ahead to see if the temp is immediately assigned to a final variable
-                    if i + 1 < len(ir_code):
+                    if i + 1 < n:
                         next_instruction = ir_code[i+1]
                         assignment_match = assignment_pattern.match(next_instruction)
                         # Does the next line look like: v_final = call_target_temp ?
@@ -1,9 +1,11 @@
 # lexer.py  (tightened version)
 from dataclasses import dataclass
+import os
 import re
+import sys
 from typing import Iterator, List, Dict, Optional, Tuple
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     type: str
     value: Optional[object]
@@ -21,26 +23,91 @@ class LexerError(Exception):
         self.line = line
         self.column = column
 
-class Lexer:
-    """Regex-based Lexer for SPL – rejects every illegal character."""
-    DEFAULT_TOKEN_SPEC: List[Tuple[str, str]] = [
-        ('SKIP',         r'[ \t\r]+'),
-        ('COMMENT',      r'//.*'),
-        ('NUMBER',       r'(0|[1-9][0-9]*)'),
-        ('STRING',       r'"[a-z0-9 ]{0,15}"'),
-        ('LBRACE',       r'\{'),
-        ('RBRACE',       r'\}'),
-        ('LPAREN',       r'\('),
-        ('RPAREN',       r'\)'),
-        ('SEMICOLON',    r';'),
-        ('ASSIGN',       r'='),
-        ('GT',           r'>'),
-        ('COMMA',        r','),
-        ('ID',           r'[a-z][a-z]*[0-9]*'),
-        ('NEWLINE',      r'\n+'),
-        ('MISMATCH',     r'.'),          # <-- catches everything else
+def _build_kw_pattern(words) -> str:
+    """
+    Builds a regex alternation matching exactly `words`, with common prefixes
+    factored out (e.g. 'pdef|plus|print|proc' -> 'p(?:def|lus|r(?:int|oc))').
+    """
+    words = sorted(words)
+    groups: Dict[str, List[str]] = {}
+    for w in words:
+        if w:
+            groups.setdefault(w[0], []).append(w[1:])
+    alts = []
+    for first, rests in groups.items():
+        if len(rests) == 1:
+            alts.append(re.escape(first + rests[0]))
+        else:
+            alts.append(re.escape(first) + f"(?:{_build_kw_pattern(rests)})")
+    if '' in words:                             # a word that is a prefix of another
+        alts.append('')
+    return "|".join(alts)
+
+# Per-group statements for the generated tokenizers. EMIT( becomes `yield (` or
+# `append(`; a group with no entry is punctuation (type = group name, no value).
+_COL = "start_index - line_start + 1"
+_TOKEN_ACTIONS: Dict[str, List[str]] = {
+    'SKIP':    ['pass'],
+    'COMMENT': ['pass'],
+    'NEWLINE': ['lineno += match_end - start_index',        # NEWLINE matches only '\n' characters
+                'line_start = match_end'],
+    'KEYWORD': [f'EMIT(Tok(keywords[m.group()], None, lineno, {_COL}, start_index))'],
+    # never a keyword: KEYWORD is tried first. Names are interned so every later
+    # name comparison / symbol-table lookup on them can short-circuit on identity
+    'ID':      [f"EMIT(Tok('ID', intern(m.group()), lineno, {_COL}, start_index))"],
+    'NUMBER':  [f"EMIT(Tok('NUMBER', int(m.group()), lineno, {_COL}, start_index))"],
+    'STRING':  ['inner = m.group()[1:-1]',
+                'if len(inner) > 15:',
+                f'    raise LexerError(f"String literal exceeds 15 characters", lineno, {_COL})',
+                f"EMIT(Tok('STRING', inner, lineno, {_COL}, start_index))"],
+}
+
+def _build_tokenize_src(name: str, token_spec: List[Tuple[str, str]], keywords: Dict[str, str], as_list: bool) -> str:
+    """
+    Writes the source of a tokenizer specialised to one grammar: one if/elif
+    branch per named group, in spec order, with the keyword table inlined as a
+    literal. as_list=False gives a generator, as_list=True a list builder.
+    """
+    emit = 'append(' if as_list else 'yield ('
+    lines = [
+        f"def {name}(self, text, filename='<input>'):",
+        "    lineno = 1",
+        "    line_start = 0",
+        "    pos = 0",
+        f"    keywords = {keywords!r}",
+        "    raise_illegal = self._raise_illegal",
+    ]
+    if as_list:
+        lines += ["    tokens = []", "    append = tokens.append"]
+    lines += [
+        "    for m in finditer(text):",
+        "        start_index, match_end = m.span()",
+        "        if start_index != pos:",
+        "            raise_illegal(text, pos, lineno, line_start)",
+        "        typ = m.lastgroup",
+    ]
+    for i, (group, _) in enumerate(token_spec):
+        body = _TOKEN_ACTIONS.get(group, [f"EMIT(Tok({group!r}, None, lineno, {_COL}, start_index))"])
+        lines.append(f"        {'if' if i == 0 else 'elif'} typ == {group!r}:")
+        lines += [f"            {stmt.replace('EMIT(', emit)}" for stmt in body]
+    lines += [
+        "        pos = match_end",
+        "    if pos != len(text):",                   # illegal character after the last match
+        "        raise_illegal(text, pos, lineno, line_start)",
+        f"    {emit}Tok('EOF', None, lineno, pos - line_start + 1, pos))",
     ]
+    if as_list:
+        lines.append("    return tokens")
+    return "\n".join(lines) + "\n"
 
+def _build_tokenizer(name: str, token_spec: List[Tuple[str, str]], keywords: Dict[str, str], pattern: "re.Pattern", as_list: bool):
+    """Compiles the specialised tokenizer for `token_spec`/`keywords` (see _build_tokenize_src)."""
+    ns = {'finditer': pattern.finditer, 'intern': sys.intern, 'Tok': Token, 'LexerError': LexerError}
+    exec(compile(_build_tokenize_src(name, token_spec, keywords, as_list), f"<lexer_gen:{name}>", 'exec'), ns)
+    return ns[name]
+
+class Lexer:
+    """Regex-based Lexer for SPL – rejects every illegal character."""
     DEFAULT_KEYWORDS: Dict[str, str] = {
         'glob': 'GLOB', 'proc': 'PROC', 'func': 'FUNC', 'main': 'MAIN',
         'var': 'VAR', 'local': 'LOCAL', 'return': 'RETURN', 'halt': 'HALT',
@@ -53,55 +120,86 @@ class Lexer:
         'fdef': 'FDEF', 'pdef': 'PDEF', 'algo': 'ALGO'
     }
 
-    master_pattern = re.compile("|".join(f"(?P<{name}>{pat})" for name, pat in DEFAULT_TOKEN_SPEC))
+    # Apart from KEYWORD, which must come before ID (and only matches a whole
+    # word), every alternative starts with a distinct set of characters, so the
+    # order below only affects speed: SRE tries the branches left to right, and
+    # the most frequent tokens (whitespace, words, punctuation) come first.
+    # Numbers, strings, newlines and comments are rare per character of input.
+    DEFAULT_TOKEN_SPEC: List[Tuple[str, str]] = [
+        ('SKIP',         r'[ \t\r]+'),
+        ('KEYWORD',      f'(?:{_build_kw_pattern(DEFAULT_KEYWORDS)})(?![a-z0-9])'),
+        ('ID',           r'[a-z][a-z]*[0-9]*'),
+        ('LPAREN',       r'\('),
+        ('RPAREN',       r'\)'),
+        ('SEMICOLON',    r';'),
+        ('ASSIGN',       r'='),
+        ('LBRACE',       r'\{'),
+        ('RBRACE',       r'\}'),
+        ('NUMBER',       r'(0|[1-9][0-9]*)'),
+        ('GT',           r'>'),
+        ('COMMA',        r','),
+        ('NEWLINE',      r'\n+'),
+        ('STRING',       r'"[a-z0-9 ]{0,15}"'),
+        ('COMMENT',      r'//.*'),
+        # anything not matched above is an illegal character (see tokenize)
+    ]
+
+    # SPL source is ASCII-only; re.ASCII pins that down for any class shorthand added to the spec
+    master_pattern = re.compile("|".join(f"(?P<{name}>{pat})" for name, pat in DEFAULT_TOKEN_SPEC), re.ASCII)
     _keyword_values_lookup = {v: k for k, v in DEFAULT_KEYWORDS.items()}
 
     # ---------- token generators ----------
-    def tokenize(self, text: str, filename: str = "<input>") -> Iterator[Token]:
-        lineno = 1
-        line_start = 0
-        pos = 0
-        end = len(text)
-        while pos < end:
-            m = Lexer.master_pattern.match(text, pos)
-            if not m:                               # should never happen
-                col = pos - line_start + 1
-                raise LexerError(f"Unexpected character '{text[pos]}' at {filename}:{lineno}:{col}", lineno, col)
-
-            typ = m.lastgroup
-            val = m.group(typ)
-            col = m.start() - line_start + 1
-            start_index = m.start()
-
-            if typ == 'NEWLINE':
-                lineno += val.count('\n')
-                line_start = m.end()
-            elif typ in ('SKIP', 'COMMENT'):
-                pass
-            elif typ == 'ID':
-                yield Token(Lexer.DEFAULT_KEYWORDS.get(val, 'ID'),
-                           None if val in Lexer.DEFAULT_KEYWORDS else val,
-                           lineno, col, start_index)
-            elif typ == 'NUMBER':
-                yield Token('NUMBER', int(val), lineno, col, start_index)
-            elif typ == 'STRING':
-                inner = val[1:-1]
-                if len(inner) > 15:
-                    raise LexerError(f"String literal exceeds 15 characters", lineno, col)
-                yield Token('STRING', inner, lineno, col, start_index)
-            elif typ == 'MISMATCH':                 # <<-- illegal character
-                raise LexerError(f"Illegal character {val!r}", lineno, col)
-            else:                                   # punctuation
-                yield Token(typ, None, lineno, col, start_index)
-            pos = m.end()
-
-        yield Token('EOF', None, lineno, pos - line_start + 1, pos)
+    # Both are generated from the spec above (see _build_tokenize_src): every
+    # group gets its own branch with the work inlined, so nothing is looked up
+    # on Lexer per token. Every character must be covered by some match of the
+    # finditer walk, so a gap between matches is an illegal character.
+    tokenize = _build_tokenizer('tokenize', DEFAULT_TOKEN_SPEC, DEFAULT_KEYWORDS, master_pattern, as_list=False)
+    tokenize.__doc__ = "Yields the tokens of `text`, ending with an EOF token."
+
+    tokenize_list = _build_tokenizer('tokenize_list', DEFAULT_TOKEN_SPEC, DEFAULT_KEYWORDS, master_pattern, as_list=True)
+    tokenize_list.__doc__ = """
+        Same token stream as tokenize(), built eagerly into a list. This is the
+        form Parser takes, and it skips the generator suspend/resume per token.
+        """
+
+    @classmethod
+    def rebuild_tokenizers(cls) -> None:
+        """
+        Regenerates master_pattern, tokenize() and tokenize_list() from the
+        current DEFAULT_TOKEN_SPEC / DEFAULT_KEYWORDS. The generated tokenizers
+        inline the spec, so call this after editing either one at runtime.
+        """
+        cls.master_pattern = re.compile("|".join(f"(?P<{name}>{pat})" for name, pat in cls.DEFAULT_TOKEN_SPEC), re.ASCII)
+        for name, as_list in (('tokenize', False), ('tokenize_list', True)):
+            tokenizer = _build_tokenizer(name, cls.DEFAULT_TOKEN_SPEC, cls.DEFAULT_KEYWORDS, cls.master_pattern, as_list)
+            tokenizer.__doc__ = getattr(cls, name).__doc__
+            setattr(cls, name, tokenizer)
+
+    @staticmethod
+    def _raise_illegal(text: str, pos: int, lineno: int, line_start: int):
+        col = pos - line_start + 1
+        raise LexerError(f"Illegal character {text[pos]!r}", lineno, col)
 
     def tokenize_file(self, path: str) -> Iterator[Token]:
+        yield from self.tokenize(self._read_source(path), filename=path)
+
+    @staticmethod
+    def _read_source(path: str) -> str:
+        """Reads the whole file with raw os.read calls (no io buffering layer) and decodes once."""
         try:
-            with open(path, encoding='utf-8') as f:
-                yield from self.tokenize(f.read(), filename=path)
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                size = os.fstat(fd).st_size
+                chunks = []
+                while True:
+                    chunk = os.read(fd, max(size, 1))
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+            finally:
+                os.close(fd)
+            return b"".join(chunks).decode('utf-8')
         except FileNotFoundError:
             raise LexerError(f"File not found: {path}")
         except Exception as e:
-            raise LexerError(f"Error reading file {path}: {e}")
\ No newline at end of file
+            raise LexerError(f"Error reading file {path}: {e}")
@@ -4,62 +4,77 @@ from ast_nodes import *
 from typing import List, Optional, Union
 import re
 
+# Keyword tables built once at import instead of per parser / per error
+_KW_BY_TYPE = {v: k for k, v in Lexer.DEFAULT_KEYWORDS.items()}  # token type -> keyword text
+_KW_NAMES = frozenset(Lexer.DEFAULT_KEYWORDS)
+
 class ParseError(Exception):
     def __init__(self, message, token: Optional[Token] = None):
+        # Only the raw parts are stored; the located message is built in __str__,
+        # so raising (and catching) a ParseError does no string formatting
+        super().__init__(message)
+        self.message = message
+        self.token = token
+
+    def __str__(self):
+        token = self.token
         if token and isinstance(token, Token):
             loc = f" at line {token.line}, col {token.column}"
             val_str = f"{token.value!r}" if token.value is not None else ""
-            # Safely access keywords via Lexer class
-            keyword_map = {v: k for k, v in Lexer.DEFAULT_KEYWORDS.items()}
-            kw_val = keyword_map.get(token.type)
+            kw_val = _KW_BY_TYPE.get(token.type)
             kw_info = f" (keyword '{kw_val}')" if kw_val else ""
             # Truncate long values in error message
             if len(val_str) > 20: val_str = val_str[:17] + "...'"
             val_info = f" near token {val_str} (type {token.type}{kw_info})"
-            super().__init__(f"{message}{loc}{val_info}")
+            return f"{self.message}{loc}{val_info}"
         elif token is not None:
-             super().__init__(f"{message} near unexpected item {token!r}")
-        else:
-            super().__init__(message)
-        self.token = token
+            return f"{self.message} near unexpected item {token!r}"
+        return str(self.message)
 
 class Parser:
+    _BINOP_MAP = {'EQ_WORD': 'eq', 'GT': '>', 'OR': 'or', 'AND': 'and', 'PLUS_WORD': 'plus', 'MINUS_WORD': 'minus', 'MULT_WORD': 'mult', 'DIV_WORD': 'div'}
+    _UNOP_MAP = {'NEG_WORD': 'neg', 'NOT': 'not'}
+    # Tokens that can start an instruction / that close an algorithm block
+    _INSTR_START = frozenset({'HALT', 'PRINT', 'ID', 'WHILE', 'DO', 'IF'})
+    _ALGO_END = frozenset({'RBRACE', 'UNTIL', 'ELSE', 'RETURN', 'EOF'})
+    _BLOCK_START = frozenset({'WHILE', 'DO', 'IF'})
+    _ATOM_START = frozenset({'ID', 'NUMBER'})
+
     def __init__(self, tokens: List[Token]):
         if not tokens: raise ParseError("Cannot parse empty token list.")
-        self.tokens = tokens
+        # Pad the stream so it always ends in two EOF tokens: the parser never
+        # advances past EOF, so the cursor and _peek() can index without bounds checks
+        last = tokens[-1]
+        eof = last if last.type == 'EOF' else Token('EOF', None, last.line, last.column, last.index)
+        self.tokens = list(tokens) + ([eof] if eof is last else [eof, eof])
         self.current_pos = 0
-        self.current_tok: Optional[Token] = self.tokens[self.current_pos]
-        self._keyword_values = {v: k for k, v in Lexer.DEFAULT_KEYWORDS.items()}
+        self.current_tok: Token = self.tokens[self.current_pos]
+        # Parallel array of token types: the hot lookahead checks only need the
+        # type, so they read this list instead of dereferencing Token objects
+        self._types: List[str] = [tok.type for tok in self.tokens]
+        self.current_type: str = self._types[self.current_pos]
 
     def _advance(self):
         self.current_pos += 1
-        self.current_tok = self.tokens[self.current_pos] if self.current_pos < len(self.tokens) else None
+        self.current_tok = self.tokens[self.current_pos]
+        self.current_type = self._types[self.current_pos]
 
-    def _peek(self) -> Optional[Token]:
-        peek_pos = self.current_pos + 1
-        return self.tokens[peek_pos] if peek_pos < len(self.tokens) else None
+    def _peek(self) -> Token:
+        return self.tokens[self.current_pos + 1]
 
     def _match(self, expected_type: str, expected_value: Optional[str] = None):
         tok = self.current_tok
+        if self.current_type == expected_type and expected_type != 'EOF':
+            self._advance()
+            return tok
         if not tok or tok.type == 'EOF':
             if expected_type == 'EOF': return tok
             last_token = self.tokens[self.current_pos-1] if self.current_pos > 0 else None
             raise ParseError(f"Expected token type '{expected_type}' but found end of input", token=last_token)
 
-        if tok.type == expected_type:
-            matched_token = tok
-            self._advance()
-            return matched_token
-        else:
-            expected_desc = f"'{expected_value}' (type {expected_type})" if expected_value else f"type '{expected_type}'"
-            found_kw = self._keyword_values.get(tok.type)
-            found_desc = f"type '{tok.type}'"
-            if found_kw: found_desc += f" (keyword '{found_kw}')"
-            if tok.value is not None:
-                 val_str = f"{tok.value!r}"
-                 if len(val_str) > 20: val_str = val_str[:17] + "...'"
-                 found_desc += f" with value {val_str}"
-            raise ParseError(f"Expected {expected_desc}", token=tok)
+        # The found token is described by ParseError itself (only if the error is printed)
+        expected_desc = f"'{expected_value}' (type {expected_type})" if expected_value else f"type '{expected_type}'"
+        raise ParseError(f"Expected {expected_desc}", token=tok)
 
     def parse(self) -> ProgramNode:
         program_node = self._parse_spl_prog()
@@ -75,17 +90,19 @@ class Parser:
 
     def _parse_variables(self) -> VariableDeclsNode:
         variables = []
-        while self.current_tok and self.current_tok.type == 'ID': variables.append(self._parse_var())
+        while self.current_type == 'ID': variables.append(self._parse_var())
         return VariableDeclsNode(variables=variables)
 
     def _parse_var(self) -> VarNode:
         tok = self._match('ID')
-        if tok.value in Lexer.DEFAULT_KEYWORDS: raise ParseError(f"Identifier cannot be a keyword: '{tok.value}'", token=tok)
+        if __debug__:
+            # The lexer never emits a keyword as an ID; this only guards hand-built token lists (stripped under -O)
+            if tok.value in _KW_NAMES: raise ParseError(f"Identifier cannot be a keyword: '{tok.value}'", token=tok)
         return VarNode(name=tok.value)
 
     def _parse_procdefs(self) -> ProcDefsNode:
         procedures = []
-        while self.current_tok and self.current_tok.type == 'PDEF': procedures.append(self._parse_pdef())
+        while self.current_type == 'PDEF': procedures.append(self._parse_pdef())
         return ProcDefsNode(procedures=procedures)
 
     def _parse_pdef(self) -> ProcedureDefNode:
@@ -94,7 +111,7 @@ class Parser:
 
     def _parse_funcdefs(self) -> FuncDefsNode:
         functions = []
-        while self.current_tok and self.current_tok.type == 'FDEF': functions.append(self._parse_fdef())
+        while self.current_type == 'FDEF': functions.append(self._parse_fdef())
         return FuncDefsNode(functions=functions)
 
     def _parse_fdef(self) -> FunctionDefNode:
@@ -109,20 +126,16 @@ class Parser:
 
     def _parse_max3(self) -> Max3Node:
         variables = []
-        if self.current_tok and self.current_tok.type == 'ID':
-            variables.append(self._parse_var()) # Parse 1st
-            if self.current_tok and self.current_tok.type == 'ID':
-                variables.append(self._parse_var()) # Parse 2nd
-                if self.current_tok and self.current_tok.type == 'ID':
-                    variables.append(self._parse_var()) # Parse 3rd
-                    
-                    # After parsing three, check if a fourth ID exists
-                    if self.current_tok and self.current_tok.type == 'ID':
-                        # This is the error case
-                        raise ParseError(
-                            "Maximum number of variables (3) exceeded in list", 
-                            token=self.current_tok
-                        )
+        for _ in range(3):
+            if self.current_type != 'ID': break
+            variables.append(self._parse_var())
+        else:
+            # After parsing three, a fourth ID is the error case
+            if self.current_type == 'ID':
+                raise ParseError(
+                    "Maximum number of variables (3) exceeded in list", 
+                    token=self.current_tok
+                )
         
         return Max3Node(variables=variables)
 
@@ -132,55 +145,85 @@ class Parser:
 
     def _parse_atom(self) -> AtomNode:
         if not self.current_tok: raise ParseError("Expected id or number")
-        if self.current_tok.type == 'ID':
-            tok_value = self.current_tok.value
-            if tok_value in Lexer.DEFAULT_KEYWORDS: raise ParseError(f"Expected id or number but found keyword '{tok_value}'", token=self.current_tok)
-            return AtomNode(value=self._parse_var())
-        elif self.current_tok.type == 'NUMBER': tok = self._match('NUMBER'); return AtomNode(value=tok.value)
+        if self.current_type == 'ID': return AtomNode(value=self._parse_var())
+        elif self.current_type == 'NUMBER': tok = self._match('NUMBER'); return AtomNode(value=tok.value)
         else: raise ParseError("Expected identifier or number", token=self.current_tok)
 
     # --- REVISED _parse_algo ---
     def _parse_algo(self) -> AlgorithmNode:
-        instr_start_tokens = {'HALT', 'PRINT', 'ID', 'WHILE', 'DO', 'IF'}
-        algo_end_tokens = {'RBRACE', 'UNTIL', 'ELSE', 'RETURN', 'EOF'}
-
-        if not self.current_tok or self.current_tok.type not in instr_start_tokens:
-            if self.current_tok and self.current_tok.type in algo_end_tokens:
-                 raise ParseError("Algorithm block cannot be empty", token=self.current_tok)
-            else:
-                 raise ParseError("Expected instruction to start algorithm", token=self.current_tok)
-
-        instructions = [self._parse_instr()]
-
-        while self.current_tok and self.current_tok.type == 'SEMICOLON':
-            semicolon_token = self.current_tok
-            next_tok = self._peek()
-
-            # **REVISED FIX**: If the *next* token marks the end of the algo block
-            # (e.g., RETURN, RBRACE), break *before* consuming the semicolon.
-            if not next_tok or next_tok.type in algo_end_tokens:
-                 break # Let the caller handle the end token (and the preceding ';')
+        # Nested while/do/if bodies are parsed iteratively: opening a block pushes
+        # (kind, condition, then_algo, enclosing instructions) and closing it pops
+        # the frame and builds the node, so block depth costs no Python frames
+        instr_start_tokens = Parser._INSTR_START
+        algo_end_tokens = Parser._ALGO_END
+        block_start_tokens = Parser._BLOCK_START
+        types = self._types
+        stack = []
+        instructions = []
+
+        while True:
+            if self.current_type not in instr_start_tokens:
+                if self.current_type in algo_end_tokens:
+                     raise ParseError("Algorithm block cannot be empty", token=self.current_tok)
+                else:
+                     raise ParseError("Expected instruction to start algorithm", token=self.current_tok)
+
+            kind = self.current_type
+            if kind in block_start_tokens:
+                if kind == 'WHILE': self._match('WHILE', 'while'); condition = self._parse_term()
+                elif kind == 'DO': self._match('DO', 'do'); condition = None
+                else: self._match('IF', 'if'); condition = self._parse_term()
+                self._match('LBRACE')
+                stack.append((kind, condition, None, instructions))
+                instructions = []
+                continue
+
+            instr = self._parse_instr()
+            while True:
+                instructions.append(instr)
+                if self.current_type == 'SEMICOLON':
+                    next_type = types[self.current_pos + 1]
+                    # If the next token can start an instruction, consume ';' and parse it
+                    if next_type in instr_start_tokens:
+                        self._match('SEMICOLON')
+                        break
+                    # **REVISED FIX**: If the *next* token marks the end of the algo block
+                    # (e.g., RETURN, RBRACE), stop *before* consuming the semicolon.
+                    if next_type not in algo_end_tokens: # Found semicolon, but next token is unexpected
+                        self._match('SEMICOLON')
+                        raise ParseError("Expected instruction after semicolon", token=self.current_tok)
+
+                # End of this algo block: hand it to the caller or close the enclosing block
+                algo = AlgorithmNode(instructions=instructions)
+                if not stack: return algo
+                kind, condition, then_algo, instructions = stack.pop()
+                self._match('RBRACE')
+                if kind == 'WHILE':
+                    instr = WhileLoopNode(condition=condition, body=algo)
+                elif kind == 'DO':
+                    self._match('UNTIL', 'until'); instr = DoUntilLoopNode(body=algo, condition=self._parse_term())
+                elif kind == 'ELSE':
+                    instr = IfBranchNode(condition=condition, then_branch=then_algo, else_branch=algo)
+                elif self.current_type == 'ELSE':
+                    self._match('ELSE', 'else'); self._match('LBRACE')
+                    stack.append(('ELSE', condition, algo, instructions))
+                    instructions = []
+                    break
+                else:
+                    instr = IfBranchNode(condition=condition, then_branch=algo, else_branch=None)
+
+    # --- simple instructions (blocks are handled by _parse_algo) ---
+    def _parse_instr(self) -> ASTNode:
+        if not self.current_tok: raise ParseError("Expected instruction")
+        handler = self._INSTR_DISPATCH.get(self.current_type)
+        if handler is None: raise ParseError("Expected instruction start", token=self.current_tok)
+        return handler(self)
 
-            # If the next token can start an instruction, consume ';' and parse it
-            if next_tok.type in instr_start_tokens:
-                self._match('SEMICOLON')
-                instructions.append(self._parse_instr())
-            else: # Found semicolon, but next token is unexpected
-                 self._match('SEMICOLON')
-                 raise ParseError("Expected instruction after semicolon", token=self.current_tok)
+    def _parse_halt_instr(self) -> HaltNode: self._match('HALT', 'halt'); return HaltNode()
 
-        return AlgorithmNode(instructions=instructions)
+    def _parse_print_instr(self) -> PrintNode: self._match('PRINT', 'print'); return PrintNode(output=self._parse_output())
 
-    # --- _parse_instr down to _parse_branch (keep as is) ---
-    def _parse_instr(self) -> ASTNode:
-        if not self.current_tok: raise ParseError("Expected instruction")
-        tok_type = self.current_tok.type
-        if tok_type == 'HALT': self._match('HALT', 'halt'); return HaltNode()
-        elif tok_type == 'PRINT': self._match('PRINT', 'print'); return PrintNode(output=self._parse_output())
-        elif tok_type == 'ID': return self._parse_instr_after_id(self._parse_var())
-        elif tok_type in ('WHILE', 'DO'): return self._parse_loop()
-        elif tok_type == 'IF': return self._parse_branch()
-        else: raise ParseError("Expected instruction start", token=self.current_tok)
+    def _parse_id_instr(self) -> ASTNode: return self._parse_instr_after_id(self._parse_var())
 
     def _parse_instr_after_id(self, name_node: VarNode) -> ASTNode:
         error_token = self.current_tok
@@ -191,60 +234,51 @@ class Parser:
 
     def _parse_assign_rhs(self) -> ASTNode:
         if not self.current_tok: raise ParseError("Expected id, number, or '(' for RHS")
-        if self.current_tok.type == 'ID':
+        if self.current_type == 'ID':
             id_node = self._parse_var()
-            if self.current_tok and self.current_tok.type == 'LPAREN': self._match('LPAREN'); args = self._parse_input(); self._match('RPAREN'); return FunctionCallNode(name=id_node, arguments=args)
+            if self.current_type == 'LPAREN': self._match('LPAREN'); args = self._parse_input(); self._match('RPAREN'); return FunctionCallNode(name=id_node, arguments=args)
             return AtomNode(value=id_node)
-        elif self.current_tok.type == 'NUMBER': return self._parse_atom()
-        elif self.current_tok.type == 'LPAREN': return self._parse_parens_term()
+        elif self.current_type == 'NUMBER': return self._parse_atom()
+        elif self.current_type == 'LPAREN': return self._parse_parens_term()
         else: raise ParseError("Expected id, number, or '(' for RHS", token=self.current_tok)
 
     def _parse_parens_term(self) -> ParenTermNode:
         self._match('LPAREN')
         if not self.current_tok: raise ParseError("Expected content inside ()")
-        if self.current_tok.type in ('NEG_WORD', 'NOT'): op = self._parse_unop(); term_node = self._parse_term(); node = UnaryOperationNode(operator=op, operand=term_node)
+        if self.current_type in ('NEG_WORD', 'NOT'): op = self._parse_unop(); term_node = self._parse_term(); node = UnaryOperationNode(operator=op, operand=term_node)
         else: term1 = self._parse_term(); op = self._parse_binop(); term2 = self._parse_term(); node = BinaryOperationNode(left_operand=term1, operator=op, right_operand=term2)
         self._match('RPAREN'); return ParenTermNode(term=node)
 
     def _parse_term(self) -> TermNode:
         if not self.current_tok: raise ParseError("Expected atom or '('")
-        if self.current_tok.type in ('ID', 'NUMBER'): return TermNode(value=self._parse_atom())
-        elif self.current_tok.type == 'LPAREN': return TermNode(value=self._parse_parens_term())
+        if self.current_type in Parser._ATOM_START: return TermNode(value=self._parse_atom())
+        elif self.current_type == 'LPAREN': return TermNode(value=self._parse_parens_term())
         else: raise ParseError("Expected id, number, or '('", token=self.current_tok)
 
     def _parse_unop(self) -> str:
         if not self.current_tok: raise ParseError("Expected 'neg' or 'not'")
-        if self.current_tok.type == 'NEG_WORD': self._match('NEG_WORD', 'neg'); return 'neg'
-        elif self.current_tok.type == 'NOT': self._match('NOT', 'not'); return 'not'
-        else: raise ParseError("Expected 'neg' or 'not'", token=self.current_tok)
+        op = self._UNOP_MAP.get(self.current_type)
+        if op is None: raise ParseError("Expected 'neg' or 'not'", token=self.current_tok)
+        self._advance(); return op
 
     def _parse_binop(self) -> str:
         if not self.current_tok: raise ParseError("Expected binary operator")
-        op_map = {'EQ_WORD': 'eq', 'GT': '>', 'OR': 'or', 'AND': 'and', 'PLUS_WORD': 'plus', 'MINUS_WORD': 'minus', 'MULT_WORD': 'mult', 'DIV_WORD': 'div'}
-        tok_type = self.current_tok.type
-        if tok_type in op_map: self._match(tok_type); return op_map[tok_type]
-        else: raise ParseError(f"Expected binary operator", token=self.current_tok)
+        op = self._BINOP_MAP.get(self.current_type)
+        if op is None: raise ParseError(f"Expected binary operator", token=self.current_tok)
+        self._advance(); return op
 
     def _parse_output(self) -> Union[AtomNode, str]:
         if not self.current_tok: raise ParseError("Expected atom or string for print")
-        if self.current_tok.type in ('ID', 'NUMBER'): return self._parse_atom()
-        elif self.current_tok.type == 'STRING': tok = self._match('STRING'); return tok.value
+        if self.current_type in Parser._ATOM_START: return self._parse_atom()
+        elif self.current_type == 'STRING': tok = self._match('STRING'); return tok.value
         else: raise ParseError("Expected id, number, or string", token=self.current_tok)
 
     def _parse_input(self) -> InputNode:
         arguments = []
-        if self.current_tok and self.current_tok.type in ('ID', 'NUMBER'): arguments.append(self._parse_atom())
-        if self.current_tok and self.current_tok.type in ('ID', 'NUMBER'): arguments.append(self._parse_atom())
-        if self.current_tok and self.current_tok.type in ('ID', 'NUMBER'): arguments.append(self._parse_atom())
+        for _ in range(3):
+            if self.current_type not in Parser._ATOM_START: break
+            arguments.append(self._parse_atom())
         return InputNode(arguments=arguments)
 
-    def _parse_loop(self) -> ASTNode:
-        if not self.current_tok: raise ParseError("Expected 'while' or 'do'")
-        if self.current_tok.type == 'WHILE': self._match('WHILE', 'while'); condition = self._parse_term(); self._match('LBRACE'); body = self._parse_algo(); self._match('RBRACE'); return WhileLoopNode(condition=condition, body=body)
-        elif self.current_tok.type == 'DO': self._match('DO', 'do'); self._match('LBRACE'); body = self._parse_algo(); self._match('RBRACE'); self._match('UNTIL', 'until'); condition = self._parse_term(); return DoUntilLoopNode(body=body, condition=condition)
-        else: raise ParseError("Expected 'while' or 'do'", token=self.current_tok)
-
-    def _parse_branch(self) -> IfBranchNode:
-        self._match('IF', 'if'); condition = self._parse_term(); self._match('LBRACE'); then_algo = self._parse_algo(); self._match('RBRACE'); else_algo = None
-        if self.current_tok and self.current_tok.type == 'ELSE': self._match('ELSE', 'else'); self._match('LBRACE'); else_algo = self._parse_algo(); self._match('RBRACE')
-        return IfBranchNode(condition=condition, then_branch=then_algo, else_branch=else_algo)
\ No newline at end of file
+    # Simple instruction start token -> parse method (plain functions, called as handler(self))
+    _INSTR_DISPATCH = {'HALT': _parse_halt_instr, 'PRINT': _parse_print_instr, 'ID': _parse_id_instr}
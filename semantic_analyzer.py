@@ -4,17 +4,83 @@ Performs scope checking (Task 5) and type checking (Task 6) on the SPL AST.
 Multi-scope snapshot version – drop-in replacement.
 """
 
-from typing import Optional, List, Set, Dict, Any, Tuple
+from typing import Optional, List, Set, Dict, Any, Tuple, Mapping, Callable
+from dataclasses import fields
 from ast_nodes import *
 from symbol_table import SymbolTable, SymbolInfo, SymbolTableError
 
 
+# Expression type tags, as returned by the _visit_* methods and stored in
+# node._sem_type. Small ints compare without touching string data; use
+# type_name() wherever a type has to be shown to the user.
+NUMERIC = 0
+BOOLEAN = 1
+TYPE_NAMES = ("numeric", "boolean")
+
+
+def type_name(type_: int) -> str:
+    """'numeric' / 'boolean' for a type tag."""
+    return TYPE_NAMES[type_]
+
+
+# Error codes: message templates, filled in with the SemanticError's arguments
+# only when the message is read. Raising (and catching) does no string work.
+E_SYMBOL_TABLE = "Symbol table error: {}"
+E_GLOBAL_CLASH = "Global scope violation: {}"
+E_NESTED_PROGRAM = "Program must be analyzed at scope level 0, not {} (use a fresh analyzer)"
+E_SHADOWING = "Shadowing error: {}"
+E_DUPLICATE_VARIABLE = "Duplicate variable declaration '{}' in the same scope"
+E_DUPLICATE_PROCEDURE = "Duplicate procedure declaration '{}'"
+E_DUPLICATE_FUNCTION = "Duplicate function declaration '{}'"
+E_DUPLICATE_PARAMETER = "Duplicate parameter '{}' in parameter list"
+E_DUPLICATE_LOCAL = "Duplicate local variable '{}'"
+E_UNDEFINED_VARIABLE = "Undefined variable '{}'"
+E_UNDEFINED_TARGET = "Undefined variable '{}' in assignment"
+E_UNDEFINED_FUNCTION = "Undefined function '{}'"
+E_UNDEFINED_PROCEDURE = "Undefined procedure '{}'"
+E_NOT_A_FUNCTION = "'{}' is not a function (it's a {})"
+E_NOT_A_PROCEDURE = "'{}' is not a procedure (it's a {})"
+E_NON_NUMERIC_TARGET = "Cannot assign to non-numeric variable '{}'"
+E_ASSIGNMENT_TYPE = "Assignment to '{}' requires numeric value, got {}"
+E_RETURN_TYPE = "Function '{}' must return a numeric value, but returns {}"
+E_OPERAND_TYPE = "Operator '{}' requires {} operand, got {}"
+E_LEFT_OPERAND_TYPE = "Operator '{}' requires {} left operand, got {}"
+E_RIGHT_OPERAND_TYPE = "Operator '{}' requires {} right operand, got {}"
+E_WHILE_CONDITION = "While loop condition must be boolean, got {}"
+E_UNTIL_CONDITION = "Do-until loop condition must be boolean, got {}"
+E_IF_CONDITION = "If condition must be boolean, got {}"
+E_UNKNOWN_INSTRUCTION = "Unknown instruction type: {}"
+E_PRINT_OUTPUT = "Invalid print output type: {}"
+E_RHS = "Invalid RHS type: {}"
+E_PARENTHESISED_TERM = "Invalid term in parentheses: {}"
+E_TERM = "Invalid term value: {}"
+E_ATOM = "Invalid atom value type: {}"
+E_UNKNOWN_UNARY_OPERATOR = "Unknown unary operator: {}"
+E_UNKNOWN_BINARY_OPERATOR = "Unknown binary operator: {}"
+
+
 class SemanticError(Exception):
     """Exception raised for semantic errors during analysis."""
-    def __init__(self, message: str, node: Optional[ASTNode] = None):
-        self.message = message
+    def __init__(self, message: str, *args: Any, node: Optional[ASTNode] = None):
+        # `message` is an error code (template) when `args` are given
+        super().__init__(message, *args)
+        self.code = message
         self.node = node
-        super().__init__(message)
+
+    @property
+    def message(self) -> str:
+        return self.code.format(*self.args[1:]) if len(self.args) > 1 else self.code
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class _UntilCondition:
+    """Worklist item for a do-until condition, checked after its loop body."""
+    __slots__ = ("condition",)
+
+    def __init__(self, condition: TermNode):
+        self.condition = condition
 
 
 class SemanticAnalyzer:
@@ -22,16 +88,35 @@ class SemanticAnalyzer:
     Performs scope checking (Task 5) and type checking (Task 6) on the AST.
     """
 
+    # operator -> (operand type, result type)
+    _BIN_OP_TABLE: Dict[str, Tuple[int, int]] = {
+        "plus": (NUMERIC, NUMERIC), "minus": (NUMERIC, NUMERIC),
+        "mult": (NUMERIC, NUMERIC), "div": (NUMERIC, NUMERIC),
+        "eq": (NUMERIC, BOOLEAN), ">": (NUMERIC, BOOLEAN),
+        "and": (BOOLEAN, BOOLEAN), "or": (BOOLEAN, BOOLEAN),
+    }
+    _UNARY_OP_TABLE: Dict[str, Tuple[int, int]] = {
+        "neg": (NUMERIC, NUMERIC),
+        "not": (BOOLEAN, BOOLEAN),
+    }
+
     def __init__(self):
         self.symbol_table = SymbolTable()
         self.errors: List[str] = []
         self.current_function_name: Optional[str] = None
 
-        # Type information storage (annotates nodes)
-        self.node_types: Dict[int, str] = {}  # Maps node id -> type ('numeric' or 'boolean')
+        # Type information is stored on the nodes themselves (node._sem_type);
+        # the analyzed root is kept so node_types can still be built on demand
+        self._ast: Optional[ProgramNode] = None
 
-        # NEW: collect every scope stack state we ever see
-        self._scope_history: List[Tuple[str, List[Dict[str, SymbolInfo]]]] = []
+        # NEW: collect every scope stack state we ever see (opt-in, see
+        # enable_scope_history(): only print_full_symbol_story() reads it)
+        self._enable_scope_history: bool = False
+        self._scope_history: List[Tuple[str, List[Mapping[str, SymbolInfo]]]] = []
+
+        # symbol_table.lookup() with its binding stack bound in (see
+        # SymbolTable.build_specialized_lookup); stays valid across scope changes
+        self._resolve: Callable[[str], Optional[SymbolInfo]] = self.symbol_table.build_specialized_lookup()
 
     # ==================== Main Entry Point ====================
 
@@ -43,6 +128,7 @@ class SemanticAnalyzer:
         """
         try:
             # Visit the entire AST
+            self._ast = ast
             self._visit_program(ast)
 
             # If we collected any errors, raise them
@@ -53,17 +139,20 @@ class SemanticAnalyzer:
             return final_symbol_table_state
 
         except SymbolTableError as e:
-            raise SemanticError(f"Symbol table error: {e}")
+            raise SemanticError(E_SYMBOL_TABLE, e)
 
     # ==================== Task 5: Scope Checking ====================
 
-    def _visit_program(self, node: ProgramNode):
+    def _visit_program(self, node: ProgramNode) -> None:
         """Visit the root program node and establish global scope."""
-        is_toplevel_call = self.symbol_table.current_scope_level() == 0
-        if is_toplevel_call:
-            self.symbol_table.enter_scope("Global", node)
-        # Enter global scope
-        self.symbol_table.enter_scope("Global", node)
+        # Enter global scope (once: a second push left every lookup walking an
+        # extra, empty frame and hid the globals from the name-clash check).
+        # Globals must sit in scope level 1 for the clash check and the symbol
+        # table's global proc/func registry, so no other scope may be open.
+        open_scopes = self.symbol_table.current_scope_level()
+        if open_scopes != 0:
+            raise SemanticError(E_NESTED_PROGRAM, open_scopes)
+        self._enter_scope("Global", node)
 
         # 1. Declare all global variables
         self._visit_variable_decls(node.globals, is_global=True)
@@ -78,7 +167,7 @@ class SemanticAnalyzer:
         try:
             self.symbol_table.check_no_global_name_clashes()
         except SymbolTableError as e:
-            raise SemanticError(f"Global scope violation: {e}")
+            raise SemanticError(E_GLOBAL_CLASH, e)
 
         # 5. Now visit procedure bodies
         self._visit_procedure_defs(node.procs)
@@ -92,75 +181,35 @@ class SemanticAnalyzer:
         # FIXED: snapshot BEFORE exiting global scope
         self._snapshot_now("Global – before exit")
         # Exit global scope
-        self.symbol_table.exit_scope()
+        self._exit_scope()
 
-    def _visit_variable_decls(self, node: VariableDeclsNode, is_global: bool = False):
+    def _visit_variable_decls(self, node: VariableDeclsNode, is_global: bool = False) -> None:
         """Declare variables and check for duplicates in current scope."""
-        seen_names = set()
-
-        for var_node in node.variables:
-            var_name = var_node.name
+        # Declare in symbol table (default type is 'numeric')
+        self._declare_unique([(var_node.name, var_node) for var_node in node.variables],
+                             "var", "numeric", E_DUPLICATE_VARIABLE)
 
-            # Check for duplicate in this declaration list
-            if var_name in seen_names:
-                raise SemanticError(
-                    f"Duplicate variable declaration '{var_name}' in the same scope"
-                )
-            seen_names.add(var_name)
-
-            # Declare in symbol table (default type is 'numeric')
-            try:
-                self.symbol_table.declare_var(var_name, var_node, decl_type="numeric")
-            except SymbolTableError as e:
-                raise SemanticError(str(e))
-
-    def _declare_procedures(self, node: ProcDefsNode):
+    def _declare_procedures(self, node: ProcDefsNode) -> None:
         """Declare all procedure signatures in current (global) scope."""
-        seen_names = set()
-
-        for proc_def in node.procedures:
-            proc_name = proc_def.name.name
-
-            if proc_name in seen_names:
-                raise SemanticError(
-                    f"Duplicate procedure declaration '{proc_name}'"
-                )
-            seen_names.add(proc_name)
+        self._declare_unique([(proc_def.name.name, proc_def) for proc_def in node.procedures],
+                             "proc", None, E_DUPLICATE_PROCEDURE)
 
-            try:
-                self.symbol_table.declare_proc(proc_name, proc_def)
-            except SymbolTableError as e:
-                raise SemanticError(str(e))
-
-    def _declare_functions(self, node: FuncDefsNode):
+    def _declare_functions(self, node: FuncDefsNode) -> None:
         """Declare all function signatures in current (global) scope."""
-        seen_names = set()
-
-        for func_def in node.functions:
-            func_name = func_def.name.name
-
-            if func_name in seen_names:
-                raise SemanticError(
-                    f"Duplicate function declaration '{func_name}'"
-                )
-            seen_names.add(func_name)
+        self._declare_unique([(func_def.name.name, func_def) for func_def in node.functions],
+                             "func", None, E_DUPLICATE_FUNCTION)
 
-            try:
-                self.symbol_table.declare_func(func_name, func_def)
-            except SymbolTableError as e:
-                raise SemanticError(str(e))
-
-    def _visit_procedure_defs(self, node: ProcDefsNode):
+    def _visit_procedure_defs(self, node: ProcDefsNode) -> None:
         """Visit all procedure definitions and check their bodies."""
         for proc_def in node.procedures:
             self._visit_procedure_def(proc_def)
 
-    def _visit_procedure_def(self, node: ProcedureDefNode):
+    def _visit_procedure_def(self, node: ProcedureDefNode) -> None:
         """Visit a single procedure definition."""
         proc_name = node.name.name
 
         # Enter procedure scope
-        self.symbol_table.enter_scope("Procedure", node)
+        self._enter_scope("Procedure", node)
 
         # Declare parameters
         param_names = self._visit_parameters(node.params)
@@ -170,20 +219,20 @@ class SemanticAnalyzer:
 
         self._snapshot_now(f"Procedure '{proc_name}' – end")
         # Exit procedure scope
-        self.symbol_table.exit_scope()
+        self._exit_scope()
 
-    def _visit_function_defs(self, node: FuncDefsNode):
+    def _visit_function_defs(self, node: FuncDefsNode) -> None:
         """Visit all function definitions and check their bodies."""
         for func_def in node.functions:
             self._visit_function_def(func_def)
 
-    def _visit_function_def(self, node: FunctionDefNode):
+    def _visit_function_def(self, node: FunctionDefNode) -> None:
         """Visit a single function definition."""
         func_name = node.name.name
         self.current_function_name = func_name
 
         # Enter function scope
-        self.symbol_table.enter_scope("Function", node)
+        self._enter_scope("Function", node)
 
         # Declare parameters
         param_names = self._visit_parameters(node.params)
@@ -193,14 +242,12 @@ class SemanticAnalyzer:
 
         # Check return atom type (must be numeric or variable)
         return_type = self._visit_atom(node.return_atom)
-        if return_type != "numeric":
-            raise SemanticError(
-                f"Function '{func_name}' must return a numeric value, but returns {return_type}"
-            )
+        if return_type != NUMERIC:
+            raise SemanticError(E_RETURN_TYPE, func_name, type_name(return_type))
 
         self._snapshot_now(f"Function '{func_name}' – end")
         # Exit function scope
-        self.symbol_table.exit_scope()
+        self._exit_scope()
         self.current_function_name = None
 
     def _visit_parameters(self, node: Max3Node) -> List[str]:
@@ -208,24 +255,11 @@ class SemanticAnalyzer:
         Declare parameters and return list of parameter names.
         Check for duplicate parameters.
         """
-        param_names = []
-        seen_names = set()
-
-        for var_node in node.variables:
-            param_name = var_node.name
+        param_names = [var_node.name for var_node in node.variables]
 
-            if param_name in seen_names:
-                raise SemanticError(
-                    f"Duplicate parameter '{param_name}' in parameter list"
-                )
-            seen_names.add(param_name)
-            param_names.append(param_name)
-
-            # Declare as parameter (default numeric)
-            try:
-                self.symbol_table.declare_param(param_name, var_node, decl_type="numeric")
-            except SymbolTableError as e:
-                raise SemanticError(str(e))
+        # Declare as parameters (default numeric)
+        self._declare_unique([(var_node.name, var_node) for var_node in node.variables],
+                             "param", "numeric", E_DUPLICATE_PARAMETER)
 
         return param_names
 
@@ -235,40 +269,27 @@ class SemanticAnalyzer:
         Returns list of local variable names.
         """
         # Declare local variables (Max3Node)
-        local_names = []
-        seen_names = set()
-
-        for var_node in node.locals.variables:
-            local_name = var_node.name
+        local_names = [var_node.name for var_node in node.locals.variables]
 
-            if local_name in seen_names:
-                raise SemanticError(
-                    f"Duplicate local variable '{local_name}'"
-                )
-            seen_names.add(local_name)
-            local_names.append(local_name)
-
-            # Declare in symbol table
-            try:
-                self.symbol_table.declare_var(local_name, var_node, decl_type="numeric")
-            except SymbolTableError as e:
-                raise SemanticError(str(e))
+        # Declare in symbol table
+        self._declare_unique([(var_node.name, var_node) for var_node in node.locals.variables],
+                             "var", "numeric", E_DUPLICATE_LOCAL)
 
         # Check for shadowing of parameters
         try:
             self.symbol_table.check_no_shadowing_of_params(param_names, local_names)
         except SymbolTableError as e:
-            raise SemanticError(f"Shadowing error: {e}")
+            raise SemanticError(E_SHADOWING, e)
 
         # Visit the algorithm
         self._visit_algorithm(node.algorithm)
 
         return local_names
 
-    def _visit_main_prog(self, node: MainProgNode):
+    def _visit_main_prog(self, node: MainProgNode) -> None:
         """Visit the main program block."""
         # Enter main scope
-        self.symbol_table.enter_scope("Main", node)
+        self._enter_scope("Main", node)
 
         # Declare main's local variables
         self._visit_variable_decls(node.locals)
@@ -278,42 +299,32 @@ class SemanticAnalyzer:
 
         self._snapshot_now("Main – end")
         # Exit main scope
-        self.symbol_table.exit_scope()
-
-    def _visit_algorithm(self, node: AlgorithmNode):
-        """Visit an algorithm (sequence of instructions)."""
-        for instruction in node.instructions:
-            self._visit_instruction(instruction)
-
-    def _visit_instruction(self, node: ASTNode):
-        """Dispatch to appropriate instruction visitor."""
-        if isinstance(node, HaltNode):
-            pass  # No checks needed for halt
-
-        elif isinstance(node, PrintNode):
-            self._visit_print(node)
-
-        elif isinstance(node, AssignmentNode):
-            self._visit_assignment(node)
-
-        elif isinstance(node, ProcedureCallNode):
-            self._visit_procedure_call(node)
-
-        elif isinstance(node, WhileLoopNode):
-            self._visit_while_loop(node)
-
-        elif isinstance(node, DoUntilLoopNode):
-            self._visit_do_until_loop(node)
-
-        elif isinstance(node, IfBranchNode):
-            self._visit_if_branch(node)
-
-        else:
-            raise SemanticError(f"Unknown instruction type: {type(node).__name__}")
+        self._exit_scope()
+
+    def _visit_algorithm(self, node: AlgorithmNode) -> None:
+        """
+        Visit an algorithm (sequence of instructions), nested loop/branch bodies
+        included. Instructions are taken from an explicit worklist in source
+        order: block visitors push their bodies instead of recursing.
+        """
+        block_dispatch = self._BLOCK_DISPATCH
+        instr_dispatch = self._INSTR_DISPATCH
+        worklist: List[ASTNode] = node.instructions[::-1]
+        while worklist:
+            instruction = worklist.pop()
+            kind = type(instruction)
+            block = block_dispatch.get(kind)
+            if block is not None:
+                block(self, instruction, worklist)
+                continue
+            handler = instr_dispatch.get(kind)
+            if handler is None:
+                raise SemanticError(E_UNKNOWN_INSTRUCTION, kind.__name__)
+            handler(self, instruction)
 
     # ==================== Task 6: Type Checking ====================
 
-    def _visit_print(self, node: PrintNode):
+    def _visit_print(self, node: PrintNode) -> None:
         """
         Visit print statement.
         Output can be: ATOM (id or number) or string literal.
@@ -325,87 +336,85 @@ class SemanticAnalyzer:
             # Type check the atom
             self._visit_atom(node.output)
         else:
-            raise SemanticError(f"Invalid print output type: {type(node.output)}")
+            raise SemanticError(E_PRINT_OUTPUT, type(node.output))
 
-    def _visit_assignment(self, node: AssignmentNode):
+    def _visit_assignment(self, node: AssignmentNode) -> None:
         """
         Visit assignment: VAR = RHS
         - Variable must be declared
         - Variable must be numeric (all variables in SPL are numeric)
         - RHS must evaluate to numeric
         """
-        var_name = node.variable.name
         var_node = node.variable
+        var_name = var_node.name
 
         # Check variable is declared
-        var_info = self.symbol_table.lookup(var_name)
+        var_info = self._resolve(var_name)
         if var_info is None:
-            raise SemanticError(f"Undefined variable '{var_name}' in assignment")
+            raise SemanticError(E_UNDEFINED_TARGET, var_name)
 
         var_node.symbol_info = var_info
 
         # Check variable is numeric (should always be true in SPL)
         if var_info.decl_type != "numeric":
-            raise SemanticError(
-                f"Cannot assign to non-numeric variable '{var_name}'"
-            )
+            raise SemanticError(E_NON_NUMERIC_TARGET, var_name)
 
         # Type check RHS
         rhs_type = self._visit_rhs(node.rhs)
 
         # RHS must be numeric
-        if rhs_type != "numeric":
-            raise SemanticError(
-                f"Assignment to '{var_name}' requires numeric value, got {rhs_type}"
-            )
+        if rhs_type != NUMERIC:
+            raise SemanticError(E_ASSIGNMENT_TYPE, var_name, type_name(rhs_type))
 
-    def _visit_rhs(self, node: ASTNode) -> str:
+    def _visit_rhs(self, node: ASTNode) -> int:
         """
         Visit right-hand side of assignment.
         Can be: AtomNode, FunctionCallNode, or ParenTermNode
-        Returns the type ('numeric' or 'boolean')
-        """
-        if isinstance(node, AtomNode):
-            return self._visit_atom(node)
-
-        elif isinstance(node, FunctionCallNode):
-            return self._visit_function_call(node)
-
-        elif isinstance(node, ParenTermNode):
-            return self._visit_paren_term(node)
-
-        else:
-            raise SemanticError(f"Invalid RHS type: {type(node).__name__}")
-
-    def _visit_atom(self, node: AtomNode) -> str:
+        Returns the type tag (NUMERIC or BOOLEAN)
+        """
+        kind = type(node)
+        if kind is ParenTermNode:
+            # Parenthesised term: visit the operation inside directly
+            term = node.term
+            handler = self._OP_DISPATCH.get(type(term))
+            if handler is None:
+                raise SemanticError(E_PARENTHESISED_TERM, type(term))
+            return handler(self, term)
+        handler = self._RHS_DISPATCH.get(kind)
+        if handler is None:
+            raise SemanticError(E_RHS, kind.__name__)
+        return handler(self, node)
+
+    def _visit_atom(self, node: AtomNode) -> int:
         """
         Visit an atom (id or number).
-        Returns 'numeric' (all atoms in SPL are numeric).
+        Returns NUMERIC (all atoms in SPL are numeric).
         """
-        if isinstance(node.value, int):
+        value = node.value
+        if isinstance(value, int):
             # Number literal
-            self._set_node_type(node, "numeric")
-            return "numeric"
+            node._sem_type = NUMERIC  # inlined _set_node_type (hot path)
+            return NUMERIC
 
-        elif isinstance(node.value, VarNode):
+        elif isinstance(value, VarNode):
             # Variable reference
-            var_node = node.value
-            var_name = node.value.name
-            var_info = self.symbol_table.lookup(var_name)
+            var_node = value
+            var_name = var_node.name
+            var_info = self._resolve(var_name)
 
             if var_info is None:
-                raise SemanticError(f"Undefined variable '{var_name}'")
+                raise SemanticError(E_UNDEFINED_VARIABLE, var_name)
 
             var_node.symbol_info = var_info
 
             # All variables in SPL are numeric
-            self._set_node_type(node, "numeric")
-            return "numeric"
+            node._sem_type = NUMERIC  # inlined _set_node_type (hot path)
+            return NUMERIC
 
         else:
-            raise SemanticError(f"Invalid atom value type: {type(node.value)}")
+            raise SemanticError(E_ATOM, type(value))
 
-    def _visit_function_call(self, node: FunctionCallNode) -> str:
+    def _visit_function_call(self, node: FunctionCallNode) -> int:
         """
         Visit function call.
         - Function must be declared
@@ -416,14 +425,12 @@ class SemanticAnalyzer:
         func_name = func_node.name
 
         # Check function is declared
-        func_info = self.symbol_table.lookup(func_name)
+        func_info = self._resolve(func_name)
         if func_info is None:
-            raise SemanticError(f"Undefined function '{func_name}'")
+            raise SemanticError(E_UNDEFINED_FUNCTION, func_name)
 
         if func_info.kind != "func":
-            raise SemanticError(
-                f"'{func_name}' is not a function (it's a {func_info.kind})"
-            )
+            raise SemanticError(E_NOT_A_FUNCTION, func_name, func_info.kind)
 
         # <<< ADD ANNOTATION HERE >>>
         func_node.symbol_info = func_info
@@ -432,16 +439,16 @@ class SemanticAnalyzer:
         self._visit_input(node.arguments)
 
         # Check argument count (Optional but good practice)
-        # expected_param_count = len(func_info.extra.get('param_names', [])) # Assuming param names stored in extra
+        # expected_param_count = len(func_info.get_extra().get('param_names', [])) # Assuming param names stored in extra
         # actual_arg_count = len(node.arguments.arguments)
         # if actual_arg_count != expected_param_count:
         #     raise SemanticError(f"Function '{func_name}' expects {expected_param_count} arguments, got {actual_arg_count}")
 
         # All functions return numeric
-        self._set_node_type(node, "numeric")
-        return "numeric"
+        self._set_node_type(node, NUMERIC)
+        return NUMERIC
 
-    def _visit_procedure_call(self, node: ProcedureCallNode):
+    def _visit_procedure_call(self, node: ProcedureCallNode) -> None:
         """
         Visit procedure call.
         - Procedure must be declared
@@ -451,14 +458,12 @@ class SemanticAnalyzer:
         proc_name = proc_node.name
 
         # Check procedure is declared
-        proc_info = self.symbol_table.lookup(proc_name)
+        proc_info = self._resolve(proc_name)
         if proc_info is None:
-            raise SemanticError(f"Undefined procedure '{proc_name}'")
+            raise SemanticError(E_UNDEFINED_PROCEDURE, proc_name)
 
         if proc_info.kind != "proc":
-            raise SemanticError(
-                f"'{proc_name}' is not a procedure (it's a {proc_info.kind})"
-            )
+            raise SemanticError(E_NOT_A_PROCEDURE, proc_name, proc_info.kind)
 
         # <<< ADD ANNOTATION HERE >>>
         proc_node.symbol_info = proc_info
@@ -467,69 +472,58 @@ class SemanticAnalyzer:
         self._visit_input(node.arguments)
 
         # Check argument count (Optional but good practice)
-        # expected_param_count = len(proc_info.extra.get('param_names', []))
+        # expected_param_count = len(proc_info.get_extra().get('param_names', []))
         # actual_arg_count = len(node.arguments.arguments)
         # if actual_arg_count != expected_param_count:
         #     raise SemanticError(f"Procedure '{proc_name}' expects {expected_param_count} arguments, got {actual_arg_count}")
 
-    def _visit_input(self, node: InputNode):
+    def _visit_input(self, node: InputNode) -> None:
         """Visit input arguments (0-3 atoms)."""
+        visit_atom = self._visit_atom
         for arg in node.arguments:
-            self._visit_atom(arg)
-
-    def _visit_paren_term(self, node: ParenTermNode) -> str:
-        """
-        Visit parenthesized term.
-        Returns the type of the inner term.
-        """
-        if isinstance(node.term, UnaryOperationNode):
-            return self._visit_unary_op(node.term)
-        elif isinstance(node.term, BinaryOperationNode):
-            return self._visit_binary_op(node.term)
-        else:
-            raise SemanticError(f"Invalid term in parentheses: {type(node.term)}")
+            visit_atom(arg)
 
-    def _visit_term(self, node: TermNode) -> str:
+    def _visit_term(self, node: TermNode) -> int:
         """
         Visit a term (atom or parenthesized term).
         Returns the type.
         """
-        if isinstance(node.value, AtomNode):
-            return self._visit_atom(node.value)
-        elif isinstance(node.value, ParenTermNode):
-            return self._visit_paren_term(node.value)
+        value = node.value
+        kind = type(value)
+        if kind is AtomNode:
+            type_ = self._visit_atom(value)
+        elif kind is ParenTermNode:
+            # Parenthesised term: visit the operation inside directly
+            term = value.term
+            handler = self._OP_DISPATCH.get(type(term))
+            if handler is None:
+                raise SemanticError(E_PARENTHESISED_TERM, type(term))
+            type_ = handler(self, term)
         else:
-            raise SemanticError(f"Invalid term value: {type(node.value)}")
+            raise SemanticError(E_TERM, kind)
+        node._sem_type = type_  # inlined _set_node_type (hot path)
+        return type_
 
-    def _visit_unary_op(self, node: UnaryOperationNode) -> str:
+    def _visit_unary_op(self, node: UnaryOperationNode) -> int:
         """
         Visit unary operation (neg or not).
         - 'neg' requires numeric operand, returns numeric
         - 'not' requires boolean operand, returns boolean
         """
-        operator = node.operator
         operand_type = self._visit_term(node.operand)
+        operator = node.operator
 
-        if operator == "neg":
-            if operand_type != "numeric":
-                raise SemanticError(
-                    f"Operator 'neg' requires numeric operand, got {operand_type}"
-                )
-            self._set_node_type(node, "numeric")
-            return "numeric"
-
-        elif operator == "not":
-            if operand_type != "boolean":
-                raise SemanticError(
-                    f"Operator 'not' requires boolean operand, got {operand_type}"
-                )
-            self._set_node_type(node, "boolean")
-            return "boolean"
+        signature = self._UNARY_OP_TABLE.get(operator)
+        if signature is None:
+            raise SemanticError(E_UNKNOWN_UNARY_OPERATOR, operator)
+        expected, result = signature
 
-        else:
-            raise SemanticError(f"Unknown unary operator: {operator}")
+        if operand_type != expected:
+            raise SemanticError(E_OPERAND_TYPE, operator, type_name(expected), type_name(operand_type))
+        node._sem_type = result  # inlined _set_node_type (hot path)
+        return result
 
-    def _visit_binary_op(self, node: BinaryOperationNode) -> str:
+    def _visit_binary_op(self, node: BinaryOperationNode) -> int:
         """
         Visit binary operation.
         Type rules:
@@ -537,116 +531,188 @@ class SemanticAnalyzer:
         - Comparison (eq, >): numeric × numeric → boolean
         - Logical (and, or): boolean × boolean → boolean
         """
+        visit_term = self._visit_term
+        left_type = visit_term(node.left_operand)
+        right_type = visit_term(node.right_operand)
         operator = node.operator
-        left_type = self._visit_term(node.left_operand)
-        right_type = self._visit_term(node.right_operand)
-
-        # Arithmetic operators
-        if operator in ("plus", "minus", "mult", "div"):
-            if left_type != "numeric":
-                raise SemanticError(
-                    f"Operator '{operator}' requires numeric left operand, got {left_type}"
-                )
-            if right_type != "numeric":
-                raise SemanticError(
-                    f"Operator '{operator}' requires numeric right operand, got {right_type}"
-                )
-            self._set_node_type(node, "numeric")
-            return "numeric"
-
-        # Comparison operators
-        elif operator in ("eq", ">"):
-            if left_type != "numeric":
-                raise SemanticError(
-                    f"Operator '{operator}' requires numeric left operand, got {left_type}"
-                )
-            if right_type != "numeric":
-                raise SemanticError(
-                    f"Operator '{operator}' requires numeric right operand, got {right_type}"
-                )
-            self._set_node_type(node, "boolean")
-            return "boolean"
-
-        # Logical operators
-        elif operator in ("and", "or"):
-            if left_type != "boolean":
-                raise SemanticError(
-                    f"Operator '{operator}' requires boolean left operand, got {left_type}"
-                )
-            if right_type != "boolean":
-                raise SemanticError(
-                    f"Operator '{operator}' requires boolean right operand, got {right_type}"
-                )
-            self._set_node_type(node, "boolean")
-            return "boolean"
 
-        else:
-            raise SemanticError(f"Unknown binary operator: {operator}")
+        signature = self._BIN_OP_TABLE.get(operator)
+        if signature is None:
+            raise SemanticError(E_UNKNOWN_BINARY_OPERATOR, operator)
+        expected, result = signature
+
+        if left_type != expected:
+            raise SemanticError(E_LEFT_OPERAND_TYPE, operator, type_name(expected), type_name(left_type))
+        if right_type != expected:
+            raise SemanticError(E_RIGHT_OPERAND_TYPE, operator, type_name(expected), type_name(right_type))
+        node._sem_type = result  # inlined _set_node_type (hot path)
+        return result
 
-    def _visit_while_loop(self, node: WhileLoopNode):
+    def _visit_while_loop(self, node: WhileLoopNode, worklist: List[ASTNode]) -> None:
         """
         Visit while loop.
-        Condition must be boolean.
+        Condition must be boolean; the body is queued on the worklist.
         """
         condition_type = self._visit_term(node.condition)
 
-        if condition_type != "boolean":
-            raise SemanticError(
-                f"While loop condition must be boolean, got {condition_type}"
-            )
+        if condition_type != BOOLEAN:
+            raise SemanticError(E_WHILE_CONDITION, type_name(condition_type))
 
-        self._visit_algorithm(node.body)
+        worklist.extend(reversed(node.body.instructions))
 
-    def _visit_do_until_loop(self, node: DoUntilLoopNode):
+    def _visit_do_until_loop(self, node: DoUntilLoopNode, worklist: List[ASTNode]) -> None:
         """
         Visit do-until loop.
-        Condition must be boolean.
+        The body is queued with the condition behind it, so the condition is
+        checked (by _visit_until_condition) once the whole body has been visited.
         """
-        self._visit_algorithm(node.body)
+        worklist.append(_UntilCondition(node.condition))
+        worklist.extend(reversed(node.body.instructions))
 
-        condition_type = self._visit_term(node.condition)
+    def _visit_until_condition(self, item: _UntilCondition, worklist: List[ASTNode]) -> None:
+        """Do-until loop condition must be boolean."""
+        condition_type = self._visit_term(item.condition)
 
-        if condition_type != "boolean":
-            raise SemanticError(
-                f"Do-until loop condition must be boolean, got {condition_type}"
-            )
+        if condition_type != BOOLEAN:
+            raise SemanticError(E_UNTIL_CONDITION, type_name(condition_type))
 
-    def _visit_if_branch(self, node: IfBranchNode):
+    def _visit_if_branch(self, node: IfBranchNode, worklist: List[ASTNode]) -> None:
         """
         Visit if statement.
-        Condition must be boolean.
+        Condition must be boolean; the then-branch is queued ahead of the else-branch.
         """
         condition_type = self._visit_term(node.condition)
 
-        if condition_type != "boolean":
-            raise SemanticError(
-                f"If condition must be boolean, got {condition_type}"
-            )
-
-        self._visit_algorithm(node.then_branch)
+        if condition_type != BOOLEAN:
+            raise SemanticError(E_IF_CONDITION, type_name(condition_type))
 
         if node.else_branch is not None:
-            self._visit_algorithm(node.else_branch)
+            worklist.extend(reversed(node.else_branch.instructions))
+
+        worklist.extend(reversed(node.then_branch.instructions))
+
+    # Exact node class -> visitor (one dict probe instead of an isinstance chain).
+    # Built once per class from the plain functions above; called as handler(self, node).
+    _INSTR_DISPATCH = {
+        HaltNode: lambda self, node: None,  # No checks needed for halt
+        PrintNode: _visit_print,
+        AssignmentNode: _visit_assignment,
+        ProcedureCallNode: _visit_procedure_call,
+    }
+    # Worklist items that push more work (or were pushed as work, like a
+    # do-until condition); called as handler(self, item, worklist).
+    _BLOCK_DISPATCH = {
+        WhileLoopNode: _visit_while_loop,
+        DoUntilLoopNode: _visit_do_until_loop,
+        _UntilCondition: _visit_until_condition,
+        IfBranchNode: _visit_if_branch,
+    }
+    _RHS_DISPATCH = {
+        AtomNode: _visit_atom,
+        FunctionCallNode: _visit_function_call,
+    }
+    # Operation inside a ParenTermNode (handled inline by _visit_rhs/_visit_term)
+    _OP_DISPATCH = {
+        UnaryOperationNode: _visit_unary_op,
+        BinaryOperationNode: _visit_binary_op,
+    }
 
     # ==================== Utility Methods ====================
 
-    def _set_node_type(self, node: ASTNode, type_: str):
+    def _declare_unique(self, entries: List[Tuple[str, ASTNode]], kind: str, decl_type: Optional[str],
+                        message: str) -> None:
+        """
+        Declare one declaration list's (name, node) entries in order, stopping
+        at the first problem: a name already in the current scope raises the
+        symbol table's error, a name repeated within the list raises
+        SemanticError(message, name) - whichever comes first in the list.
+        """
+        names = [name for name, _ in entries]
+        repeat = len(names)
+        if len(set(names)) != repeat:
+            seen: Set[str] = set()
+            for repeat, name in enumerate(names):
+                if name in seen:
+                    break
+                seen.add(name)
+            entries = entries[:repeat]
+        error = self.symbol_table.try_declare(entries, kind, decl_type)
+        if error is not None:
+            raise SemanticError(error)
+        if repeat < len(names):
+            raise SemanticError(message, names[repeat])
+
+    def _enter_scope(self, scope_kind: str, node: ASTNode) -> None:
+        """Push a symbol-table scope."""
+        self.symbol_table.enter_scope(scope_kind, node)
+
+    def _exit_scope(self) -> None:
+        """Pop a symbol-table scope."""
+        self.symbol_table.exit_scope()
+
+    def _set_node_type(self, node: ASTNode, type_: int) -> None:
         """Store type information for a node."""
-        self.node_types[id(node)] = type_
+        node._sem_type = type_
 
     def get_node_type(self, node: ASTNode) -> Optional[str]:
-        """Retrieve stored type for a node."""
-        return self.node_types.get(id(node))
+        """Retrieve stored type for a node ('numeric', 'boolean' or None)."""
+        type_ = node._sem_type
+        return None if type_ is None else TYPE_NAMES[type_]
+
+    @property
+    def node_types(self) -> Dict[int, str]:
+        """
+        Maps node id -> type ('numeric' or 'boolean') for every typed node of the
+        analyzed AST. Built by walking the tree on each access; prefer get_node_type().
+        """
+        types: Dict[int, str] = {}
+        if self._ast is not None:
+            for node in self._iter_nodes(self._ast):
+                type_ = node._sem_type
+                if type_ is not None:
+                    types[id(node)] = TYPE_NAMES[type_]
+        return types
+
+    def invalidate(self, node: ASTNode) -> None:
+        """
+        Forget the types computed for `node` and everything below it. Every
+        analysis re-derives names and types itself; call this after editing a
+        tree so no stale type is read (get_node_type, code generation) before
+        the next analysis.
+        """
+        for sub in self._iter_nodes(node):
+            if sub._sem_type is not None:
+                sub._sem_type = None
+
+    @staticmethod
+    def _iter_nodes(root: ASTNode):
+        """Yield `root` and every AST node below it."""
+        stack: List[Any] = [root]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+            elif isinstance(node, ASTNode):
+                yield node
+                stack.extend(getattr(node, f.name) for f in fields(node))
 
     def _snapshot_now(self, label: str) -> None:
-        """Capture current stack state and remember it."""
+        """Capture current stack state and remember it (if scope history is enabled)."""
+        if not self._enable_scope_history:
+            return
         self._scope_history.append((label, self.symbol_table.get_scope_snapshot()))
 
+    def enable_scope_history(self) -> None:
+        """Record a scope snapshot at every scope exit, for print_full_symbol_story()."""
+        self._enable_scope_history = True
+
     def print_full_symbol_story(self) -> None:
         """Print every scope stack we ever captured."""
         print("\n" + "="*60)
         print("COMPLETE SCOPE HISTORY")
         print("="*60)
+        if not self._enable_scope_history:
+            print("(not collected: call enable_scope_history() before analyze())")
         for label, snap in self._scope_history:
             print(f"\n{label}")
             for lvl, scope in enumerate(snap, 1):
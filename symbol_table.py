@@ -15,15 +15,27 @@ API highlights:
     st.get_unique_name(name)  # mapping original -> internal (v1, v2,...)
 """
 
+import sys
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 
 
 class SymbolTableError(Exception):
     pass
 
 
-@dataclass
+def _node_id(node: Any) -> int:
+    """Foreign key for an AST node: its explicit node_id if it has one (even 0), else id(node); 0 for None."""
+    if node is None:
+        return 0
+    nid = getattr(node, "node_id", None)
+    return nid if nid is not None else id(node)
+
+
+# eq=False: a SymbolInfo is one declaration, so equality and hashing are by
+# identity and entries can key dicts and sets in later passes
+@dataclass(slots=True, eq=False)
 class SymbolInfo:
     name: str                 # original name in source
     kind: str                 # 'var' | 'proc' | 'func' | 'param'
@@ -31,21 +43,49 @@ class SymbolInfo:
     scope_level: int          # 0 = Everywhere, 1 = Global, 2+ nested
     unique_name: str          # internal name used by IR (vx, etc.)
     node_id: int              # foreign key to AST node (id(node) or explicit node.node_id)
-    extra: Dict[str, Any] = None  # optional storage for other metadata
+    extra: Optional[Dict[str, Any]] = None  # optional storage for other metadata; created on first set_extra()
+
+    def get_extra(self) -> Mapping[str, Any]:
+        """The metadata stored with set_extra() (read-only; empty if there is none)."""
+        return self.extra if self.extra is not None else _EMPTY_EXTRA
+
+    def set_extra(self, key: str, value: Any) -> None:
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+
+_EMPTY_EXTRA: Mapping[str, Any] = MappingProxyType({})
 
 
 class SymbolTable:
+    __slots__ = ("_stack", "_name_stack", "_by_node_id", "_name_counters", "_global_procs", "_global_funcs",
+                 "_global_by_kind", "_unique_prefix", "_unique_stems", "_shared_depth", "_clash_key", "_clash_error")
+
     def __init__(self, base_unique_prefix: str = "v"):
-        # stack of scope dicts; each dict: name -> SymbolInfo
-        self._scopes: List[Dict[str, SymbolInfo]] = []
-        # metadata about scopes (for debugging): (scope_kind, node_id)
-        self._scope_meta: List[Tuple[str, int]] = []
+        # stack of scope frames: (scope dict name -> SymbolInfo, scope_kind, node_id)
+        self._stack: List[Tuple[Dict[str, SymbolInfo], str, int]] = []
+        # name -> SymbolInfos declared under it in the open scopes, innermost last
+        self._name_stack: Dict[str, List[SymbolInfo]] = {}
+        # node_id -> first (outermost) open SymbolInfo declared for it; built by the
+        # first find_symbol_by_node() and kept up to date from then on
+        self._by_node_id: Optional[Dict[int, SymbolInfo]] = None
         # global mapping original_name -> next counter (for unique names)
         self._name_counters: Dict[str, int] = {}
         # global list of all declared procs/funcs (useful for cross-checks)
         self._global_procs: Dict[str, SymbolInfo] = {}
         self._global_funcs: Dict[str, SymbolInfo] = {}
+        self._global_by_kind: Dict[str, Dict[str, SymbolInfo]] = {"proc": self._global_procs, "func": self._global_funcs}
         self._unique_prefix = base_unique_prefix
+        # base name -> "<prefix>_<name>_", so a unique name only formats its counter
+        self._unique_stems: Dict[str, str] = {}
+        # scopes[:_shared_depth] are also referenced by a snapshot; the top scope
+        # is copied before its first mutation after a snapshot (copy-on-write)
+        self._shared_depth = 0
+        # (id, size) of the global scope at the last clash check, and its result;
+        # reset by every global declaration
+        self._clash_key: Optional[Tuple[int, int]] = None
+        self._clash_error: Optional[str] = None
 
         # start with empty "Everywhere" scope? We'll let caller explicitly push scopes.
         # But we can prepare an empty top-level container:
@@ -59,51 +99,81 @@ class SymbolTable:
         node: AST node for which this scope is created (optional). We'll use id(node) as foreign key.
         """
         node_id = id(node) if node is not None else 0
-        self._scopes.append({})
-        self._scope_meta.append((scope_kind, node_id))
+        self._stack.append(({}, scope_kind, node_id))
 
     def exit_scope(self) -> None:
         """Pop the current scope. If no scope exists, raise."""
-        if not self._scopes:
+        stack = self._stack
+        if not stack:
             raise SymbolTableError("Cannot exit scope: no scope on stack")
-        popped = self._scopes.pop()
-        self._scope_meta.pop()
+        popped = stack.pop()[0]
+        name_stack = self._name_stack
+        for name in popped:
+            infos = name_stack[name]
+            infos.pop()
+            if not infos:
+                del name_stack[name]
+        by_node_id = self._by_node_id
+        if by_node_id is not None:
+            for si in popped.values():
+                if by_node_id.get(si.node_id) is si:
+                    del by_node_id[si.node_id]
+        if self._shared_depth > len(stack):
+            self._shared_depth = len(stack)
+        if not stack:
+            self._clash_key = None
         # Note: entries removed are gone; spec assumes scopes not needed after exit.
 
     def current_scope_level(self) -> int:
         """Return current depth (0 means no scopes pushed, 1 = first scope)."""
-        return len(self._scopes)
+        return len(self._stack)
 
     def current_scope_name(self) -> Optional[str]:
-        return self._scope_meta[-1][0] if self._scope_meta else None
+        return self._stack[-1][1] if self._stack else None
 
     # ---------- unique-name generation ----------
     def _gen_unique_name(self, base_name: str) -> str:
         c = self._name_counters.get(base_name, 0) + 1
         self._name_counters[base_name] = c
-        return f"{self._unique_prefix}_{base_name}_{c}"
+        stem = self._unique_stems.get(base_name)
+        if stem is None:
+            stem = self._unique_stems[base_name] = f"{self._unique_prefix}_{base_name}_"
+        return f"{stem}{c}"
 
     # ---------- declarations ----------
     def _declare(self, name: str, kind: str, decl_type: Optional[str], node: Any) -> SymbolInfo:
-        if not self._scopes:
+        stack = self._stack
+        if not stack:
             raise SymbolTableError("No scope to declare into; call enter_scope() first")
-        # check duplicate in current scope
-        curr = self._scopes[-1]
-        if name in curr:
-            raise SymbolTableError(f"Duplicate declaration of '{name}' in the same scope")
-        scope_level = len(self._scopes)
-        node_id = getattr(node, "node_id", None) or id(node) if node is not None else 0
+        # interned keys: probes with an identical (e.g. lexer-interned) name match by identity
+        name = sys.intern(name)
+        frame = stack[-1]
+        curr = frame[0]
+        scope_level = len(stack)
+        if scope_level <= self._shared_depth:
+            # a snapshot still shares this scope dict: give the table its own copy
+            curr = dict(curr)
+            stack[-1] = (curr, frame[1], frame[2])
+            self._shared_depth = scope_level - 1
+        node_id = _node_id(node)
         unique_name = self._gen_unique_name(name)
         info = SymbolInfo(name=name, kind=kind, decl_type=decl_type,
                           scope_level=scope_level, unique_name=unique_name,
-                          node_id=node_id, extra={})
-        curr[name] = info
+                          node_id=node_id)
+        # insert and check for a duplicate in the current scope with one probe
+        if curr.setdefault(name, info) is not info:
+            self._name_counters[name] -= 1  # the unique name was never handed out
+            raise SymbolTableError(f"Duplicate declaration of '{name}' in the same scope")
+        self._name_stack.setdefault(name, []).append(info)
+        if self._by_node_id is not None:
+            self._by_node_id.setdefault(node_id, info)
 
         # if declared at global (scope_level == 1) and kind is proc/func, track globally
-        if scope_level == 1 and kind == "proc":
-            self._global_procs[name] = info
-        if scope_level == 1 and kind == "func":
-            self._global_funcs[name] = info
+        if scope_level == 1:
+            self._clash_key = None
+            registry = self._global_by_kind.get(kind)
+            if registry is not None:
+                registry[name] = info
 
         return info
 
@@ -125,13 +195,86 @@ class SymbolTable:
         # funcs are type-less in symbol table but must return numeric per spec (checked later)
         return self._declare(name, kind="func", decl_type=None, node=node)
 
+    # ---------- bulk declarations ----------
+    def try_declare(self, entries: List[Tuple[str, Any]], kind: str, decl_type: Optional[str] = None) -> Optional[str]:
+        """
+        Non-raising bulk declare for hot callers: declares (name, node) pairs of
+        one kind ('var' | 'param' | 'proc' | 'func') and returns None on success,
+        or the error message the raising declare_* APIs would have used.
+        """
+        stack = self._stack
+        if not stack:
+            return "No scope to declare into; call enter_scope() first"
+        scope_level = len(stack)
+        frame = stack[-1]
+        curr = frame[0]
+        if entries and scope_level <= self._shared_depth:
+            # a snapshot still shares this scope dict: give the table its own copy
+            curr = dict(curr)
+            stack[-1] = (curr, frame[1], frame[2])
+            self._shared_depth = scope_level - 1
+        counters = self._name_counters
+        name_stack = self._name_stack
+        by_node_id = self._by_node_id
+        stems = self._unique_stems
+        prefix = self._unique_prefix
+        registry = None
+        if scope_level == 1:
+            self._clash_key = None
+            registry = self._global_by_kind.get(kind)
+
+        intern = sys.intern
+        getattr_, id_ = getattr, id
+        for name, node in entries:
+            name = intern(name)
+            if node is None:
+                node_id = 0
+            else:
+                node_id = getattr_(node, "node_id", None)
+                if node_id is None:
+                    node_id = id_(node)
+            c = counters.get(name, 0) + 1
+            stem = stems.get(name)
+            if stem is None:
+                stem = stems[name] = f"{prefix}_{name}_"
+            info = SymbolInfo(name=name, kind=kind, decl_type=decl_type,
+                              scope_level=scope_level, unique_name=f"{stem}{c}",
+                              node_id=node_id)
+            # insert and check for a duplicate with one probe; the counter only
+            # advances once the name is taken
+            if curr.setdefault(name, info) is not info:
+                return f"Duplicate declaration of '{name}' in the same scope"
+            counters[name] = c
+            name_stack.setdefault(name, []).append(info)
+            if by_node_id is not None:
+                by_node_id.setdefault(node_id, info)
+            if registry is not None:
+                registry[name] = info
+        return None
+
     # ---------- lookup ----------
     def lookup(self, name: str) -> Optional[SymbolInfo]:
-        """Lookup (inner->outer). Return SymbolInfo or None."""
-        for scope in reversed(self._scopes):
-            if name in scope:
-                return scope[name]
-        return None
+        """
+        Lookup (inner->outer). Return SymbolInfo or None.
+        Declared names are interned; so are the lexer's identifiers, which
+        makes their probes here identity matches without interning again.
+        """
+        infos = self._name_stack.get(name)
+        return infos[-1] if infos else None
+
+    def build_specialized_lookup(self) -> Callable[[str], Optional[SymbolInfo]]:
+        """
+        Return a function equivalent to self.lookup for hot loops: the binding
+        stack's get is bound into it once, so a call skips the method and
+        attribute lookups. It follows later scope changes (the binding stack is
+        updated in place), so it never needs rebuilding.
+        """
+        get = self._name_stack.get
+
+        def lookup(name: str) -> Optional[SymbolInfo]:
+            infos = get(name)
+            return infos[-1] if infos else None
+        return lookup
 
     def assert_exists(self, name: str) -> SymbolInfo:
         info = self.lookup(name)
@@ -149,54 +292,85 @@ class SymbolTable:
         The 'Everywhere' (spec text) means check within global-level declarations (scope level 1).
         """
         # gather all names declared in global scope (scope level 1)
-        if len(self._scopes) < 1:
+        if len(self._stack) < 1:
             return
-        global_scope = self._scopes[0] if len(self._scopes) >= 1 else {}
-
-        # find all kinds
-        vars_ = {n for n, si in global_scope.items() if si.kind == "var"}
-        procs_ = {n for n, si in global_scope.items() if si.kind == "proc"}
-        funcs_ = {n for n, si in global_scope.items() if si.kind == "func"}
-        
-        # check intersections
+        global_scope = self._stack[0][0]
+        key = (id(global_scope), len(global_scope))
+        if key != self._clash_key:
+            self._clash_error = self._find_global_name_clashes(global_scope)
+            self._clash_key = key
+        if self._clash_error is not None:
+            raise SymbolTableError(self._clash_error)
+
+    @staticmethod
+    def _find_global_name_clashes(global_scope: Mapping[str, SymbolInfo]) -> Optional[str]:
+        """The clash report for check_no_global_name_clashes, or None if there is none."""
+        # bin names by kind in one pass
+        by_kind: Dict[str, set] = {"var": set(), "proc": set(), "func": set()}
+        for n, si in global_scope.items():
+            names = by_kind.get(si.kind)
+            if names is not None:
+                names.add(n)
+        vars_, procs_, funcs_ = by_kind["var"], by_kind["proc"], by_kind["func"]
+
+        # check intersections (only when both sides are non-empty)
         clashes = []
-        if vars_ & funcs_:
+        if vars_ and funcs_ and vars_ & funcs_:
             clashes.append(f"Variable/function name clash: {vars_ & funcs_}")
-        if vars_ & procs_:
+        if vars_ and procs_ and vars_ & procs_:
             clashes.append(f"Variable/procedure name clash: {vars_ & procs_}")
-        if funcs_ & procs_:
+        if funcs_ and procs_ and funcs_ & procs_:
             clashes.append(f"Function/procedure name clash: {funcs_ & procs_}")
-        if clashes:
-            raise SymbolTableError("; ".join(clashes))
+        return "; ".join(clashes) if clashes else None
 
     def check_no_shadowing_of_params(self, param_names: List[str], local_names: List[str]) -> None:
         """
         Called while checking a particular function/procedure body:
         ensure no local variable shadows parameter names.
         """
-        shadow = set(param_names) & set(local_names)
+        if not param_names or not local_names:
+            return
+        # hash the longer list once and probe it with the shorter one
+        small, big = (param_names, local_names) if len(param_names) < len(local_names) else (local_names, param_names)
+        big_set = set(big)
+        shadow = {n for n in small if n in big_set}
         if shadow:
             raise SymbolTableError(f"Shadowing of parameters not allowed: {shadow}")
 
     # ---------- utility ----------
-    def get_scope_snapshot(self) -> List[Dict[str, SymbolInfo]]:
-        """Return shallow copy of scopes for inspection / tests."""
-        return [dict(s) for s in self._scopes]
+    def get_scope_snapshot(self) -> List[Mapping[str, SymbolInfo]]:
+        """
+        Return read-only views of the current scopes for inspection / tests.
+        No dict is copied here: the views keep showing this moment because the
+        table copies a shared scope before it next declares into it.
+        """
+        self._shared_depth = len(self._stack)
+        return [MappingProxyType(frame[0]) for frame in self._stack]
+
+    def get_scope_snapshot_copy(self) -> List[Dict[str, SymbolInfo]]:
+        """
+        Like get_scope_snapshot(), but returns plain dict copies the caller may
+        modify freely. The SymbolInfo entries themselves are shared, not copied.
+        """
+        return [dict(frame[0]) for frame in self._stack]
 
     def find_symbol_by_node(self, node: Any) -> Optional[SymbolInfo]:
         """Return symbol info whose node_id matches id(node) or node.node_id if present."""
-        search_id = getattr(node, "node_id", None) or id(node)
-        for scope in self._scopes:
-            for si in scope.values():
-                if si.node_id == search_id:
-                    return si
-        return None
+        if node is None:
+            return None  # symbols declared without a node are keyed 0, not found by node
+        search_id = _node_id(node)
+        by_node_id = self._by_node_id
+        if by_node_id is None:
+            by_node_id = self._by_node_id = {}
+            for scope, _, _ in self._stack:
+                for si in scope.values():
+                    by_node_id.setdefault(si.node_id, si)
+        return by_node_id.get(search_id)
 
     def __repr__(self):
         lines = []
-        for i, sc in enumerate(self._scopes, start=1):
-            meta = self._scope_meta[i-1] if i-1 < len(self._scope_meta) else ("<unknown>", 0)
-            lines.append(f"Scope {i} ({meta[0]}, node_id={meta[1]}):")
-            for name, info in sc.items():
-                lines.append(f"  {name} -> {info}")
+        append = lines.append
+        for i, (sc, kind, node_id) in enumerate(self._stack, start=1):
+            append(f"Scope {i} ({kind}, node_id={node_id}):")
+            lines.extend(f"  {name} -> {info}" for name, info in sc.items())
         return "\n".join(lines)